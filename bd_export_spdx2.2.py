@@ -3,7 +3,7 @@ import logging
 import sys
 import os
 
-from blackduck import Client
+from export_spdx.client import Client
 from export_spdx import globals
 from export_spdx import config
 from export_spdx import main
@@ -0,0 +1,147 @@
+#!/usr/bin/env python
+import asyncio
+import concurrent.futures
+import json
+import sqlite3
+import time
+
+
+class ResponseCache:
+    # Persistent cache of Black Duck GET responses keyed by URL and Accept header. Entries younger than the
+    # TTL are used without contacting the server, older entries are revalidated with their ETag/Last-Modified.
+    def __init__(self, path, ttl, max_size):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.hits = 0
+        self.revalidated = 0
+        self.fetched = 0
+        # The cache file can be shared by several concurrent exports, so use WAL mode and commit each change
+        # immediately rather than holding a write lock for the whole run
+        self.db = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        # The SQLite calls can wait for the disk or for a lock held by another export, so they are made from a
+        # thread of their own (see run) instead of blocking the event loop
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute('PRAGMA synchronous=NORMAL')
+        self.db.execute('''CREATE TABLE IF NOT EXISTS responses (
+                               url TEXT NOT NULL,
+                               accept TEXT NOT NULL,
+                               body BLOB NOT NULL,
+                               etag TEXT,
+                               last_modified TEXT,
+                               stored REAL NOT NULL,
+                               accessed REAL NOT NULL,
+                               size INTEGER NOT NULL,
+                               PRIMARY KEY (url, accept))''')
+        self.db.execute('CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)')
+        # Project name lookups (project is NULL for names which are not projects)
+        self.db.execute('''CREATE TABLE IF NOT EXISTS projects (
+                               server TEXT NOT NULL,
+                               name TEXT NOT NULL,
+                               project TEXT,
+                               stored REAL NOT NULL,
+                               PRIMARY KEY (server, name))''')
+        self.size = self.db.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+
+    async def run(self, func, *args):
+        # Call a cache method in the cache thread
+        return await asyncio.get_running_loop().run_in_executor(self.executor, func, *args)
+
+    def lookup(self, url, accept):
+        row = self.db.execute('SELECT body, etag, last_modified, stored FROM responses WHERE url = ? AND accept = ?',
+                              (url, accept)).fetchone()
+        if row is None:
+            return None
+        return {'body': row[0], 'etag': row[1], 'last_modified': row[2], 'stored': row[3]}
+
+    def is_fresh(self, entry, ttl=None):
+        if ttl is None:
+            ttl = self.ttl
+        return time.time() - entry['stored'] < ttl
+
+    @staticmethod
+    def conditional_headers(entry):
+        headers = {}
+        if entry is None:
+            return headers
+        if entry['etag']:
+            headers['If-None-Match'] = entry['etag']
+        if entry['last_modified']:
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def fresh_body(self, url, accept, ttl=None):
+        # Returns the cached body if it can be used without contacting the server, and the cached entry
+        entry = self.lookup(url, accept)
+        if entry is not None and self.is_fresh(entry, ttl):
+            self.hit(url, accept)
+            return entry['body'], entry
+        return None, entry
+
+    def update(self, url, accept, entry, status, headers, body, ttl=None):
+        # Record the server response to a (possibly conditional) request and return the body to use
+        if status == 304 and entry is not None:
+            self.refresh(url, accept)
+            return entry['body']
+        if ttl is None:
+            ttl = self.ttl
+        if status == 200 and (ttl > 0 or 'ETag' in headers or 'Last-Modified' in headers):
+            self.store(url, accept, body, headers.get('ETag'), headers.get('Last-Modified'))
+        return body
+
+    def hit(self, url, accept):
+        self.hits += 1
+        self.db.execute('UPDATE responses SET accessed = ? WHERE url = ? AND accept = ?', (time.time(), url, accept))
+
+    def refresh(self, url, accept):
+        # Server confirmed the cached response is still current (HTTP 304)
+        self.revalidated += 1
+        now = time.time()
+        self.db.execute('UPDATE responses SET stored = ?, accessed = ? WHERE url = ? AND accept = ?',
+                        (now, now, url, accept))
+
+    def store(self, url, accept, body, etag=None, last_modified=None):
+        self.fetched += 1
+        now = time.time()
+        old = self.db.execute('SELECT size FROM responses WHERE url = ? AND accept = ?', (url, accept)).fetchone()
+        if old is not None:
+            self.size -= old[0]
+        self.db.execute('INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                        (url, accept, body, etag, last_modified, now, now, len(body)))
+        self.size += len(body)
+        if self.size > self.max_size:
+            self.evict()
+
+    def evict(self):
+        # Remove least recently used entries until the cache is back under 90% of its maximum size
+        target = self.max_size * 0.9
+        # Other exports may have changed the file since it was opened
+        self.size = self.db.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+        rows = self.db.execute('SELECT url, accept, size FROM responses ORDER BY accessed').fetchall()
+        for url, accept, size in rows:
+            if self.size <= target:
+                break
+            self.db.execute('DELETE FROM responses WHERE url = ? AND accept = ?', (url, accept))
+            self.size -= size
+
+    def lookup_project(self, server, name, ttl):
+        # Returns (True, project or None) if the name was looked up less than ttl seconds ago, else (False, None)
+        row = self.db.execute('SELECT project, stored FROM projects WHERE server = ? AND name = ?',
+                              (server, name)).fetchone()
+        if row is None or time.time() - row[1] >= ttl:
+            return False, None
+        if row[0] is None:
+            return True, None
+        return True, json.loads(row[0])
+
+    def store_project(self, server, name, project):
+        self.db.execute('INSERT OR REPLACE INTO projects VALUES (?, ?, ?, ?)',
+                        (server, name, json.dumps(project) if project is not None else None, time.time()))
+
+    def close(self):
+        self.executor.shutdown()
+        self.db.close()
+
+    def report(self):
+        print("Response cache: {} hits, {} revalidated, {} fetched ({:.1f} MB cached)".format(
+            self.hits, self.revalidated, self.fetched, self.size / 1048576))
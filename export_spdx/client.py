@@ -0,0 +1,144 @@
+#!/usr/bin/env python
+import asyncio
+import datetime
+import urllib.parse
+
+from export_spdx import fetch
+from export_spdx import jsoncodec
+
+
+class Client:
+    # Async Black Duck REST API client. One pooled aiohttp session (opened with 'async with client') is used for
+    # all requests, which go through the fetch.Scheduler for concurrency limits, retries and caching.
+    def __init__(self, token, base_url, verify=True, timeout=15):
+        self.access_token = token
+        self.base_url = base_url
+        self.verify = verify
+        self.timeout = float(timeout)
+        self.session = None
+        self.sched = None
+        self.bearer_token = None
+        self.valid_until = datetime.datetime.now()
+        self.auth_lock = None
+        self.root_resources_dict = None
+
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def open(self):
+        self.session = fetch.create_session(self.timeout)
+        self.sched = fetch.Scheduler(self.session)
+        self.auth_lock = asyncio.Lock()
+
+    async def close(self):
+        await self.session.close()
+        # Allow the SSL connections to close before the event loop does (see aiohttp issue #1925)
+        await asyncio.sleep(0.250)
+
+    async def authenticate(self):
+        # Only one request renews the bearer token, the others wait for it
+        async with self.auth_lock:
+            if self.bearer_token and datetime.datetime.now() < self.valid_until - datetime.timedelta(minutes=5):
+                return
+            url = urllib.parse.urljoin(self.base_url, '/api/tokens/authenticate')
+            headers = {'Authorization': f'token {self.access_token}'}
+            async with self.session.post(url, headers=headers, ssl=self.sched.ssl) as resp:
+                if resp.status == 401:
+                    raise RuntimeError("Unauthorized access token")
+                resp.raise_for_status()
+                content = jsoncodec.loads(await resp.read())
+            self.bearer_token = content['bearerToken']
+            self.valid_until = datetime.datetime.now() + datetime.timedelta(
+                milliseconds=int(content['expiresInMilliseconds']))
+
+    async def headers(self, accept, auth=True):
+        headers = {'accept': accept}
+        if accept == 'application/json':
+            # Some endpoints only accept requests with a content-type
+            headers['content-type'] = 'application/json'
+        if auth:
+            if not self.bearer_token or datetime.datetime.now() > self.valid_until - datetime.timedelta(minutes=5):
+                await self.authenticate()
+            headers['Authorization'] = f'Bearer {self.bearer_token}'
+        return headers
+
+    def url(self, url, params=None):
+        url = urllib.parse.urljoin(self.base_url, url)
+        if params:
+            url += ('&' if '?' in url else '?') + urllib.parse.urlencode(params)
+        return url
+
+    async def get_json(self, url, accept='application/json', endpoint='api', params=None):
+        return await self.sched.get_json(self.url(url, params), await self.headers(accept), endpoint)
+
+    async def get_text(self, url, accept='text/plain', endpoint='api', params=None, auth=True):
+        return await self.sched.get_text(self.url(url, params), await self.headers(accept, auth), endpoint)
+
+    async def get_items(self, url, accept='application/json', endpoint='api', params=None, page_size=250,
+                        convert=None):
+        # Fetch all the items of a list resource - the first page gives the total count and the remaining
+        # pages are then requested concurrently. If convert is given each item is replaced by convert(item) (or
+        # left out if it returns None) as soon as its page arrives, so the raw pages are not all held in memory
+        params = dict(params or {})
+        params.update({'offset': 0, 'limit': page_size})
+        first, count, total = await self.get_page(url, accept, endpoint, params, convert)
+        if count < page_size:
+            return first
+
+        items = first
+        if total is not None:
+            offsets = range(page_size, total, page_size)
+            pages = await asyncio.gather(*[self.get_page(url, accept, endpoint, dict(params, offset=offset), convert)
+                                           for offset in offsets])
+            for page, _, _ in pages:
+                items += page
+            return items
+
+        offset = page_size
+        while True:
+            page, count, total = await self.get_page(url, accept, endpoint, dict(params, offset=offset), convert)
+            items += page
+            if count < page_size:
+                return items
+            offset += page_size
+
+    async def get_page(self, url, accept, endpoint, params, convert=None):
+        # Returns the (converted) items of one page, the number of items on the page and the total count
+        page = await self.get_json(url, accept, endpoint, params)
+        items = page.get('items', [])
+        count = len(items)
+        if convert is not None:
+            items = [item for item in map(convert, items) if item is not None]
+        else:
+            items = list(items)
+        return items, count, page.get('totalCount')
+
+    async def root_resources(self):
+        if self.root_resources_dict is None:
+            resources = dict(await self.get_json('/api/'))
+            resources.pop('_meta', None)
+            resources['href'] = self.url('/api/')
+            self.root_resources_dict = resources
+        return self.root_resources_dict
+
+    @staticmethod
+    def list_resources(parent):
+        # Named resources (link relations) of a resource object, plus 'href' for the object itself
+        resources = {}
+        for link in parent['_meta']['links']:
+            resources[link['rel']] = link['href']
+        resources['href'] = parent['_meta'].get('href')
+        return resources
+
+    async def get_resource(self, name, parent=None, params=None, accept='application/json', convert=None):
+        if parent is None:
+            resources = await self.root_resources()
+        else:
+            resources = self.list_resources(parent)
+        if name not in resources:
+            raise KeyError(f"resource name '{name}' not found in available resources")
+        return await self.get_items(resources[name], accept, params=params, convert=convert)
@@ -0,0 +1,51 @@
+#!/usr/bin/env python
+
+
+def link_index(raw):
+    # Link relation -> href for the links of an API object (the first link is used if a relation is repeated)
+    links = {}
+    for link in raw.get('_meta', {}).get('links', []):
+        links.setdefault(link['rel'], link['href'])
+    return links
+
+
+class Origin:
+    # The first origin of a BOM component
+    __slots__ = ('namespace', 'external_id', 'links')
+
+    def __init__(self, raw):
+        self.namespace = raw.get('externalNamespace')
+        self.external_id = raw.get('externalId')
+        self.links = link_index(raw)
+
+
+class Component:
+    # A BOM (or hierarchical BOM) component entry holding only the fields used for the export, so the API
+    # response can be released as soon as the component list has been read
+    __slots__ = ('name', 'version_name', 'component', 'component_version', 'component_type', 'match_types',
+                 'description', 'origin', 'license_type', 'licenses', 'links')
+
+    def __init__(self, raw):
+        self.name = raw.get('componentName')
+        self.version_name = raw.get('componentVersionName')
+        self.component = raw.get('component')
+        self.component_version = raw.get('componentVersion')
+        self.component_type = raw.get('componentType')
+        self.match_types = raw.get('matchTypes', [])
+        self.description = raw.get('description')
+
+        origins = raw.get('origins')
+        self.origin = Origin(origins[0]) if origins else None
+
+        # Licenses as (SPDX id, display name, license URL) - a license with several licenses (e.g. dual licensing)
+        # is replaced by its licenses and the license type used to combine them
+        self.license_type = "NONE"
+        self.licenses = None
+        if 'licenses' in raw:
+            lics = raw['licenses']
+            if len(lics) > 0 and len(lics[0].get('licenses', [])) > 1:
+                self.license_type = lics[0]['licenseType']
+                lics = lics[0]['licenses']
+            self.licenses = [(lic.get('spdxId'), lic.get('licenseDisplay'), lic.get('license')) for lic in lics]
+
+        self.links = link_index(raw)
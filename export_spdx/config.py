@@ -5,14 +5,28 @@ import os
 
 from export_spdx import spdx
 from export_spdx import globals
+from export_spdx import writer
 
 parser = argparse.ArgumentParser(description='"Export SPDX JSON format file for the given project and version"',
                                  prog='bd_export_spdx22_json.py')
 parser.add_argument("project_name", type=str, help='Black Duck project name')
 parser.add_argument("project_version", type=str, help='Black Duck version name')
 parser.add_argument("-v", "--version", help="Print script version and exit", action='store_true')
-parser.add_argument("-o", "--output", type=str,
-                    help="Output SPDX file name (SPDX JSON format) - default '<proj>-<ver>.json'", default="")
+parser.add_argument("-o", "--output", type=str, action='append',
+                    help="Output SPDX file name (SPDX JSON format, tag-value for a .spdx file or a CSV license "
+                         "summary for a .csv file) - can be repeated to write several files from one export "
+                         "(--format, --compress and --compact then apply to all of them) - default "
+                         "'<proj>-<ver>.json'")
+parser.add_argument("--format", choices=['json', 'tag-value', 'csv'],
+                    help="Output format for all the output files (default from each output file extension - "
+                         "tag-value for .spdx, CSV for .csv, otherwise JSON)",
+                    default="")
+parser.add_argument("--compact", help="Write the SPDX JSON files without indentation (smaller output files)",
+                    action='store_true')
+parser.add_argument("--compress", choices=['none', 'gzip', 'xz', 'bz2'],
+                    help="Compress the output file while it is written (default from the output file extension "
+                         "- .gz, .xz or .bz2)",
+                    default="")
 parser.add_argument("-r", "--recursive", help="Scan sub-projects within projects (default = false)",
                     action='store_true')
 parser.add_argument("--download_loc",
@@ -37,6 +51,44 @@ parser.add_argument("--blackduck_api_token", type=str,
                     help="Black Duck API token URL (can also be set as env. var. BLACKDUCK_API_TOKEN)", default="")
 parser.add_argument("--blackduck_trust_certs", help="BLACKDUCK trust certs", action='store_true')
 parser.add_argument("--blackduck_timeout", help="BD Server requests timeout (seconds - default 15)", default=15)
+parser.add_argument("--max_subprojects", type=int,
+                    help="Maximum number of sub-projects (BOM and component data) fetched concurrently with "
+                         "--recursive (default 4)",
+                    default=4)
+parser.add_argument("--max_concurrency", type=int,
+                    help="Maximum number of concurrent API requests (default 32)", default=32)
+parser.add_argument("--max_host_connections", type=int,
+                    help="Maximum number of open connections to the Black Duck server (default 16)", default=16)
+parser.add_argument("--endpoint_limits", type=str,
+                    help='''Concurrency limits per request class as a comma separated list of class=limit
+                    (classes: copyrights, comments, files, licenses, urls, suppliers, children, downloads (Openhub
+                    download locations - default limit 4), api (project, version and BOM list requests) - e.g.
+                    "files=4,licenses=8")''',
+                    default="")
+parser.add_argument("--fixed_concurrency",
+                    help="Always use --max_concurrency requests instead of adapting to server response times",
+                    action='store_true')
+parser.add_argument("--latency_target", type=float,
+                    help="Reduce concurrent API requests when the p95 response time exceeds this (seconds - default 2)",
+                    default=2.0)
+parser.add_argument("--retries", type=int,
+                    help="Number of times to retry API requests after throttling, server or connection errors "
+                         "(default 3)",
+                    default=3)
+parser.add_argument("--cache_file", type=str,
+                    help="Cache Black Duck API responses in this SQLite file to speed up repeated exports", default="")
+parser.add_argument("--cache_ttl", type=int,
+                    help="Time to reuse cached Knowledge Base responses before revalidating them "
+                         "(seconds - default 86400)",
+                    default=86400)
+parser.add_argument("--cache_max_size", type=int,
+                    help="Maximum size of the response cache file (MB - default 512)", default=512)
+parser.add_argument("--project_cache_ttl", type=int,
+                    help="Time to reuse sub-project name lookups stored in the --cache_file (seconds - default 3600, "
+                         "0 to always look up)",
+                    default=3600)
+parser.add_argument("--stdlib_json", help="Use the Python json module even if the faster orjson package is installed",
+                    action='store_true')
 parser.add_argument("--debug", help="Turn on debug messages", action='store_true')
 
 args = parser.parse_args()
@@ -51,11 +103,62 @@ def check_params():
         args.download_loc = False
         args.no_copyrights = True
         args.no_files = True
-    if args.output == "":
-        args.output = spdx.clean_for_spdx(args.project_name + "-" + args.project_version) + ".json"
 
-    if args.output and os.path.exists(args.output):
-        backup_file(args.output)
+    if args.max_concurrency < 1 or args.max_host_connections < 0:
+        print("ERROR: --max_concurrency must be at least 1 and --max_host_connections cannot be negative")
+        sys.exit(2)
+    if args.max_subprojects < 1:
+        print("ERROR: --max_subprojects must be at least 1")
+        sys.exit(2)
+    if args.latency_target <= 0:
+        print("ERROR: --latency_target must be greater than 0")
+        sys.exit(2)
+    if args.retries < 0:
+        print("ERROR: --retries cannot be negative")
+        sys.exit(2)
+    if args.cache_ttl < 0 or args.cache_max_size < 1 or args.project_cache_ttl < 0:
+        print("ERROR: --cache_ttl and --project_cache_ttl cannot be negative and --cache_max_size must be at least 1")
+        sys.exit(2)
+    args.endpoint_limits = parse_endpoint_limits(args.endpoint_limits)
+
+    if not args.output:
+        output = spdx.clean_for_spdx(args.project_name + "-" + args.project_version)
+        output += writer.format_extensions[args.format or 'json']
+        if args.compress not in ('', 'none'):
+            output += writer.compressors[args.compress][0]
+        args.output = [output]
+    if len(set(args.output)) < len(args.output):
+        print("ERROR: The same --output file is specified more than once")
+        sys.exit(2)
+
+    # (path, format, compression) of each output file
+    args.outputs = []
+    for output in args.output:
+        if args.compress == "":
+            compression = writer.compression_for(output)
+        elif args.compress == "none":
+            compression = None
+        else:
+            compression = args.compress
+        args.outputs.append((output, args.format or writer.format_for(output), compression))
+
+        if os.path.exists(output):
+            backup_file(output)
+
+
+def parse_endpoint_limits(limits_str):
+    limits = {}
+    for item in limits_str.split(','):
+        if item.strip() == '':
+            continue
+        endpoint, sep, limit = item.partition('=')
+        endpoint = endpoint.strip()
+        if endpoint not in globals.endpoint_classes or not limit.strip().isdigit() or int(limit) < 1:
+            print("ERROR: Invalid --endpoint_limits entry '{}' (classes are: {})".format(
+                item, ', '.join(globals.endpoint_classes)))
+            sys.exit(2)
+        limits[endpoint] = int(limit)
+    return limits
 
 
 def backup_file(filename):
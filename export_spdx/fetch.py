@@ -0,0 +1,281 @@
+#!/usr/bin/env python
+import asyncio
+import collections
+import contextlib
+import email.utils
+import random
+import time
+import aiohttp
+
+from export_spdx import globals
+from export_spdx import config
+from export_spdx import jsoncodec
+
+# Responses which mean the server is overloaded and the request window should be reduced
+throttle_statuses = [429, 500, 502, 503, 504]
+
+# Only requests with these methods are safe to send again after a failure
+idempotent_methods = ['GET', 'HEAD', 'OPTIONS']
+retry_base_delay = 0.5
+retry_max_delay = 30.0
+
+# How response bodies are parsed for Scheduler.get_json() and get_text()
+parsers = {
+    # Parsed from the response bytes without decoding them to a str first
+    'json': jsoncodec.loads,
+    'text': lambda body: body.decode('utf-8'),
+}
+
+
+def create_session(timeout):
+    # Bound the number of open sockets overall and per Black Duck host, connections are kept alive and reused
+    connector = aiohttp.TCPConnector(limit=config.args.max_concurrency,
+                                     limit_per_host=config.args.max_host_connections)
+    return aiohttp.ClientSession(connector=connector,
+                                 timeout=aiohttp.ClientTimeout(sock_connect=timeout, sock_read=timeout))
+
+
+class AdaptiveLimit:
+    # Additive increase/multiplicative decrease (AIMD) window of in-flight requests. The window grows while
+    # the p95 latency stays under the target and shrinks on slow responses or throttling/server errors.
+    def __init__(self, max_limit, latency_target, adaptive=True):
+        self.max_limit = max_limit
+        self.latency_target = latency_target
+        self.adaptive = adaptive
+        if adaptive:
+            self.window = max(1, max_limit // 4)
+        else:
+            self.window = max_limit
+        self.slow_start = True
+        self.in_flight = 0
+        self.successes = 0
+        self.last_decrease = 0.0
+        self.latencies = collections.deque(maxlen=100)
+        self.cond = asyncio.Condition()
+
+    @contextlib.asynccontextmanager
+    async def slot(self):
+        async with self.cond:
+            await self.cond.wait_for(lambda: self.in_flight < self.window)
+            self.in_flight += 1
+        try:
+            yield
+        finally:
+            async with self.cond:
+                self.in_flight -= 1
+                self.cond.notify_all()
+
+    def p95(self):
+        if len(self.latencies) < 10:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[int(len(ordered) * 0.95) - 1]
+
+    def record(self, latency, status):
+        if not self.adaptive:
+            return
+
+        if status in throttle_statuses:
+            self.decrease('HTTP {} response'.format(status))
+            return
+
+        self.latencies.append(latency)
+        p95 = self.p95()
+        if p95 is not None and p95 > self.latency_target:
+            self.decrease('p95 latency {:.2f}s'.format(p95))
+            return
+
+        self.successes += 1
+        if self.slow_start or self.successes >= self.window:
+            self.successes = 0
+            if self.window < self.max_limit:
+                self.window += 1
+                if config.args.debug and not self.slow_start:
+                    print("Request window increased to {}".format(self.window))
+
+    def decrease(self, reason):
+        # Only back off once per round trip as all the requests in flight will usually see the same condition
+        now = time.monotonic()
+        if now - self.last_decrease < max(self.p95() or 0, 1.0):
+            return
+        self.last_decrease = now
+        self.slow_start = False
+        self.successes = 0
+        self.window = max(1, self.window // 2)
+        self.latencies.clear()
+        if config.args.debug:
+            print("Request window reduced to {} ({})".format(self.window, reason))
+
+
+class Scheduler:
+    def __init__(self, session):
+        self.session = session
+        if not globals.verify:
+            self.ssl = False
+        else:
+            self.ssl = None
+
+        # Requests beyond the connections available for the host would only wait for a pool connection, and the
+        # time waiting would count as server latency and shrink the window, so the window is kept within them
+        max_window = config.args.max_concurrency
+        if config.args.max_host_connections > 0:
+            max_window = min(max_window, config.args.max_host_connections)
+        self.limit = AdaptiveLimit(max_window, config.args.latency_target,
+                                   adaptive=not config.args.fixed_concurrency)
+        self.endpoint_limits = {}
+        for endpoint in globals.endpoint_classes:
+            if endpoint in globals.external_endpoint_classes:
+                limit = config.args.endpoint_limits.get(endpoint, globals.external_endpoint_limit)
+            else:
+                limit = config.args.endpoint_limits.get(endpoint, config.args.max_concurrency)
+            self.endpoint_limits[endpoint] = asyncio.Semaphore(limit)
+
+        if config.args.debug:
+            print("Request scheduler: max_concurrency={} max_host_connections={} endpoint_limits={} "
+                  "initial window={}".format(config.args.max_concurrency, config.args.max_host_connections,
+                                             config.args.endpoint_limits, self.limit.window))
+        self.retries = collections.Counter()
+        self.failures = collections.Counter()
+        # Error responses which are not retried (e.g. HTTP 404)
+        self.errors = collections.Counter()
+        self.inflight = {}
+        self.coalesced = 0
+
+    @contextlib.asynccontextmanager
+    async def slot(self, endpoint):
+        # Take the endpoint class slot first so one busy class cannot hold global slots while it waits
+        async with self.endpoint_limits[endpoint]:
+            if endpoint in globals.external_endpoint_classes:
+                yield
+            else:
+                async with self.limit.slot():
+                    yield
+
+    async def get_json(self, url, headers, endpoint):
+        return await self.single_flight(url, headers, endpoint, 'json')
+
+    async def get_text(self, url, headers, endpoint):
+        return await self.single_flight(url, headers, endpoint, 'text')
+
+    async def single_flight(self, url, headers, endpoint, kind):
+        # Concurrent requests for the same URL and Accept header share one request and one parsed result
+        # (callers must not modify the result)
+        key = (url, headers.get('accept', ''), kind)
+        task = self.inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self.get_parsed(url, headers, endpoint, kind))
+            self.inflight[key] = task
+            task.add_done_callback(lambda t: self.inflight.pop(key, None))
+        else:
+            self.coalesced += 1
+        # Shield the shared request so one cancelled caller does not cancel it for the others
+        return await asyncio.shield(task)
+
+    async def get_parsed(self, url, headers, endpoint, kind):
+        return parsers[kind](await self.get(url, headers, endpoint))
+
+    async def get(self, url, headers, endpoint):
+        if globals.cache is None or endpoint in globals.external_endpoint_classes:
+            status, resp_headers, body = await self.request('GET', url, headers, endpoint, read_response)
+            return body
+
+        # BOM data can change at any time so is always revalidated, KB data is reused until the cache TTL expires
+        ttl = None if endpoint in globals.kb_endpoint_classes else 0
+        accept = headers.get('accept', '')
+        body, entry = await globals.cache.run(globals.cache.fresh_body, url, accept, ttl)
+        if body is not None:
+            return body
+
+        headers = dict(headers, **globals.cache.conditional_headers(entry))
+        status, resp_headers, body = await self.request('GET', url, headers, endpoint, read_response)
+        return await globals.cache.run(globals.cache.update, url, accept, entry, status, resp_headers, body, ttl)
+
+    async def request(self, method, url, headers, endpoint, reader):
+        attempts = 1
+        if method in idempotent_methods:
+            attempts += config.args.retries
+        # --blackduck_trust_certs only applies to the Black Duck server
+        external = endpoint in globals.external_endpoint_classes
+        ssl = None if external else self.ssl
+
+        for attempt in range(attempts):
+            last_attempt = attempt == attempts - 1
+            retry_after = None
+            try:
+                async with self.slot(endpoint):
+                    start = time.monotonic()
+                    async with self.session.request(method, url, headers=headers, ssl=ssl) as resp:
+                        try:
+                            if resp.status in throttle_statuses and not last_attempt:
+                                retry_after = parse_retry_after(resp.headers.get('Retry-After'))
+                                reason = 'HTTP {}'.format(resp.status)
+                            else:
+                                if resp.status >= 400:
+                                    resp.raise_for_status()
+                                return await reader(resp)
+                        finally:
+                            # The latency of other hosts says nothing about the Black Duck server
+                            if not external:
+                                self.limit.record(time.monotonic() - start, resp.status)
+            except (aiohttp.ClientConnectionError, aiohttp.ClientPayloadError, asyncio.TimeoutError) as exc:
+                if last_attempt:
+                    self.failures[endpoint] += 1
+                    raise
+                reason = exc.__class__.__name__
+            except aiohttp.ClientResponseError as exc:
+                if exc.status in throttle_statuses and attempts > 1:
+                    self.failures[endpoint] += 1
+                else:
+                    self.errors[endpoint] += 1
+                raise
+
+            self.retries[endpoint] += 1
+            delay = backoff_delay(attempt, retry_after)
+            if config.args.debug:
+                print("Retrying {} in {:.1f}s after {} (attempt {}/{})".format(url, delay, reason, attempt + 2,
+                                                                               attempts))
+            await asyncio.sleep(delay)
+
+    def report(self):
+        if sum(self.retries.values()) > 0:
+            print("Retried {} requests ({})".format(
+                sum(self.retries.values()), ', '.join('{} {}'.format(k, v) for k, v in sorted(self.retries.items()))))
+        if self.coalesced > 0:
+            print("Saved {} duplicate requests for URLs already being fetched".format(self.coalesced))
+        if sum(self.failures.values()) > 0:
+            print("Failed {} requests after retries ({})".format(
+                sum(self.failures.values()), ', '.join('{} {}'.format(k, v) for k, v in sorted(self.failures.items()))))
+        if sum(self.errors.values()) > 0:
+            print("{} requests returned errors which are not retried ({})".format(
+                sum(self.errors.values()), ', '.join('{} {}'.format(k, v) for k, v in sorted(self.errors.items()))))
+        if config.args.debug:
+            p95 = self.limit.p95()
+            print("Request window at end of run: {} (p95 latency {})".format(
+                self.limit.window, 'n/a' if p95 is None else '{:.2f}s'.format(p95)))
+
+
+async def read_response(resp):
+    return resp.status, resp.headers, await resp.read()
+
+
+def backoff_delay(attempt, retry_after=None):
+    # Exponential backoff with full jitter, never sooner than the server asked for in Retry-After
+    delay = random.uniform(0, min(retry_max_delay, retry_base_delay * 2 ** attempt))
+    if retry_after is not None:
+        delay = max(delay, min(retry_after, retry_max_delay))
+    return delay
+
+
+def parse_retry_after(value):
+    # Retry-After can either be a number of seconds or an HTTP date
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - time.time())
@@ -1,8 +1,10 @@
 #!/usr/bin/env python
 script_version = "0.23"
 
-processed_comp_list = []
-spdx_lics = []
+# Custom license id -> task returning the quoted license text (downloaded once per run)
+license_texts = {}
+# KB component href -> task returning the component homepage URL (fetched once per run)
+kb_urls = {}
 
 # The name of a custom attribute which should override the default package supplier
 SBOM_CUSTOM_SUPPLIER_NAME = "PackageSupplier"
@@ -36,15 +38,44 @@ matchtype_contains_dict = {
     "SNIPPET": "OTHER",
 }
 
+# Classes of API requests which can be given their own concurrency limit ('api' is project, version and BOM list
+# requests and 'downloads' is Openhub download location requests)
+endpoint_classes = ['copyrights', 'comments', 'files', 'licenses', 'urls', 'suppliers', 'children', 'downloads',
+                    'api']
+# Request classes returning Knowledge Base component data which can be reused from the response cache until the
+# cache TTL expires (other responses are always revalidated - copyrights and license texts can be edited on the
+# server)
+kb_endpoint_classes = ['urls']
+# Request classes sent to third-party hosts (Openhub) - they are not counted in the Black Duck request window, are
+# not cached and always verify the server certificate. They are limited to external_endpoint_limit concurrent
+# requests unless --endpoint_limits sets a limit
+external_endpoint_classes = ['downloads']
+external_endpoint_limit = 4
+
+# Number of child components requested per page when traversing the hierarchical BOM
+hierarchy_page_size = 1000
+
+# Document level SPDX fields - the packages, relationships and extracted licenses are added to the writer
 spdx = dict()
-spdx['packages'] = []
-spdx['relationships'] = []
 spdx['snippets'] = []
-spdx['hasExtractedLicensingInfos'] = []
+# Output writer (created by writer.create - a MultiWriter if there are several output files)
+writer = None
 
-spdx_ids = {}
-proj_list = []
+# Processed components, package and license ids (state.ExportState)
+state = None
+# Project name -> task returning the project or None (sub-project lookups in --recursive mode)
+project_index = {}
+# Limits the number of sub-projects fetched at the same time with --recursive
+subproject_limit = None
+# (project name, version name) -> task fetching the sub-project, so each sub-project version is only exported once
+subproject_exports = {}
+# Sub-project versions already added to the document
+exported_subprojects = set()
+# The project versions currently being processed (top level project first) to detect cycles
+subproject_path = []
 
 verify = True
 
 bd = None
+
+cache = None
@@ -0,0 +1,65 @@
+#!/usr/bin/env python
+import json
+import re
+
+# orjson is used for API responses and the SPDX output if it is installed, otherwise the json module
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Characters which the json module escapes (ensure_ascii) but orjson writes as they are
+unescaped_re = re.compile('[\x7f-\U0010ffff]')
+
+
+def use_stdlib():
+    global orjson
+    orjson = None
+
+
+def backend():
+    return 'orjson' if orjson is not None else 'json'
+
+
+def loads(data):
+    # Parse a JSON document from bytes (or str)
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps(obj, indent=False):
+    # Serialize with sorted keys, indented by 4 spaces or without whitespace. The output is the same with either
+    # backend (json.dumps(obj, indent=4, sort_keys=True) or json.dumps(obj, sort_keys=True, separators=(',', ':'))),
+    # apart from the formatting of large floats, which are not used in SPDX documents.
+    if orjson is not None:
+        try:
+            return orjson_dumps(obj, indent)
+        except TypeError:
+            # Types orjson cannot serialize
+            pass
+    if indent:
+        return json.dumps(obj, indent=4, sort_keys=True)
+    return json.dumps(obj, sort_keys=True, separators=(',', ':'))
+
+
+def orjson_dumps(obj, indent):
+    if indent:
+        text = orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_SORT_KEYS).decode('utf-8')
+        # orjson can only indent by 2 spaces so double the indentation of each line (strings cannot contain
+        # newlines as they are escaped)
+        text = '\n'.join(line[:len(line) - len(line.lstrip(' '))] + line for line in text.split('\n'))
+    else:
+        text = orjson.dumps(obj, option=orjson.OPT_SORT_KEYS).decode('utf-8')
+    if not text.isascii() or '\x7f' in text:
+        text = unescaped_re.sub(escape_char, text)
+    return text
+
+
+def escape_char(match):
+    code = ord(match.group(0))
+    if code < 0x10000:
+        return '\\u{0:04x}'.format(code)
+    # Surrogate pair
+    code -= 0x10000
+    return '\\u{0:04x}\\u{1:04x}'.format(0xd800 | (code >> 10), 0xdc00 | (code & 0x3ff))
@@ -3,13 +3,20 @@ import logging
 import sys
 import os
 import datetime
+import asyncio
+import platform
 
-from blackduck import Client
+from export_spdx.client import Client
 from export_spdx import globals
 from export_spdx import spdx
 from export_spdx import config
 from export_spdx import process
 from export_spdx import projects
+from export_spdx import cache
+from export_spdx import jsoncodec
+from export_spdx import writer
+from export_spdx.state import ExportState
+from export_spdx.component import Component
 
 logging.basicConfig(format='%(asctime)s:%(levelname)s:%(message)s', stream=sys.stderr, level=logging.INFO)
 logging.getLogger("requests").setLevel(logging.INFO)
@@ -51,15 +58,45 @@ def run():
 
     config.check_params()
 
-    project, version = projects.check_projver(config.args.project_name, config.args.project_version)
-    print("Working on project '{}' version '{}'\n".format(project['name'], version['versionName']))
+    if config.args.stdlib_json:
+        jsoncodec.use_stdlib()
+    if config.args.debug:
+        print("Using JSON backend '{}'".format(jsoncodec.backend()))
+    globals.writer = writer.create(config.args.outputs, config.args.compact)
+
+    if config.args.cache_file:
+        globals.cache = cache.ResponseCache(config.args.cache_file, config.args.cache_ttl,
+                                            config.args.cache_max_size * 1048576)
+
+    # The whole export runs on one event loop using the one Black Duck client session
+    if platform.system() == "Windows":
+        asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+    asyncio.run(async_run())
+
+    print("Done")
+
+    if globals.cache is not None:
+        globals.cache.report()
+        globals.cache.close()
+
+    spdx.write_spdx_file(globals.spdx)
 
-    bearer_token = globals.bd.session.auth.bearer_token
+
+async def async_run():
+    async with globals.bd:
+        await export_project()
+        globals.bd.sched.report()
+
+
+async def export_project():
+    project, version = await projects.check_projver(config.args.project_name, config.args.project_version)
+    print("Working on project '{}' version '{}'\n".format(project['name'], version['versionName']))
 
     if config.args.recursive:
-        globals.proj_list = projects.get_all_projects()
+        globals.subproject_limit = asyncio.Semaphore(config.args.max_subprojects)
 
     globals.spdx_custom_lics = []
+    globals.state = ExportState()
 
     toppackage = spdx.clean_for_spdx("SPDXRef-Package-" + project['name'] + "-" + version['versionName'])
     mytime = datetime.datetime.now()
@@ -127,18 +164,16 @@ def run():
             projpkg["licenseDeclared"] = "NOASSERTION"
         else:
             projpkg["licenseDeclared"] = version['license']['licenseDisplay']
-    globals.spdx['packages'].append(projpkg)
+    spdx.add_package(projpkg)
 
     if 'hierarchical-components' in globals.bd.list_resources(version):
-        hierarchical_bom = globals.bd.get_resource('hierarchical-components', parent=version)
+        hierarchical_bom = await globals.bd.get_resource('hierarchical-components', parent=version, convert=Component)
     else:
         hierarchical_bom = []
 
-    process.process_project(project, version, toppackage, hierarchical_bom, bearer_token, exclude_ignored_components)
-
-    print("Done")
-
-    spdx.write_spdx_file(globals.spdx)
+    await process.process_project(project, version, toppackage, hierarchical_bom, exclude_ignored_components)
+    await process.stop_subprojects()
+    globals.state.report()
 
 
 if __name__ == "__main__":
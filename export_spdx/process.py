@@ -1,86 +1,100 @@
 #!/usr/bin/env python
 import datetime
 import re
-import aiohttp
 import asyncio
+import tempfile
 import time
-import platform
 
 from export_spdx import globals
 from export_spdx import spdx
 from export_spdx import config
 from export_spdx import projects
 from export_spdx import data
+from export_spdx import purl
+from export_spdx import jsoncodec
+from export_spdx.component import Component
 
+# Characters removed from component descriptions
+desc_remove_re = re.compile(r"[^a-zA-Z.()\d\s\-:]")
 
-def process_comp(comps_dict, tcomp, comp_data_dict):
-    cver = tcomp['componentVersion']
+
+def process_comp(comps_dict, tcomp, comp_data=None):
+    cver = tcomp.component_version
     if cver in comps_dict.keys():
-        # ind = compverlist.index(tcomp['componentVersion'])
+        # ind = compverlist.index(tcomp.component_version)
         bomentry = comps_dict[cver]
     else:
         bomentry = tcomp
 
     spdxpackage_name = spdx.clean_for_spdx(
-        "SPDXRef-Package-" + tcomp['componentName'] + "-" + tcomp['componentVersionName'])
+        "SPDXRef-Package-" + tcomp.name + "-" + tcomp.version_name)
 
-    if spdxpackage_name in globals.spdx_ids:
+    if globals.state.has_package(spdxpackage_name):
         return spdxpackage_name
 
-    globals.spdx_ids[spdxpackage_name] = 1
+    if comp_data is None:
+        # Component data was not fetched for this component so no package can be created
+        return ''
+
+    globals.state.add_package(spdxpackage_name)
 
     # openhub_url = None
 
-    if cver not in globals.processed_comp_list:
+    if not globals.state.is_processed(cver):
         download_url = "NOASSERTION"
 
-        # fcomp = globals.bd.get_json(tcomp['component'])  # CHECK THIS
+        # fcomp = globals.bd.get_json(tcomp.component)  # CHECK THIS
         #
-        openhub_url = next((item for item in bomentry['_meta']['links'] if item["rel"] == "openhub"), None)
+        openhub_url = bomentry.links.get('openhub')
         if config.args.download_loc and openhub_url is not None:
-            download_url = data.openhub_get_download(openhub_url['href'])
+            download_url = comp_data['download']
 
         copyrights = "NOASSERTION"
         cpe = "NOASSERTION"
         pkg = "NOASSERTION"
         if not config.args.no_copyrights:
             cpe = get_cpe_of_component(bomentry)
-            copyrights = comp_data_dict[cver]['copyrights']
+            copyrights = comp_data['copyrights']
 
-            if 'origins' in bomentry.keys() and len(bomentry['origins']) > 0:
-                orig = bomentry['origins'][0]
-                if 'externalNamespace' in orig.keys() and 'externalId' in orig.keys():
-                    pkg = data.calculate_purl(orig['externalNamespace'], orig['externalId'])
+            orig = bomentry.origin
+            if orig is not None and orig.namespace is not None and orig.external_id is not None:
+                pkg = purl.purl(orig.namespace, orig.external_id)
 
         package_file = "NOASSERTION"
         if not config.args.no_files:
-            package_file = comp_data_dict[cver]['files']
+            package_file = comp_data['files']
 
         desc = 'NOASSERTION'
-        if 'description' in tcomp.keys():
-            desc = re.sub("[^a-zA-Z.()\d\s\-:]", '', bomentry['description'])
-
-        annotations = comp_data_dict[cver]['comments']
-        lic_string = comp_data_dict[cver]['licenses']
+        if tcomp.description is not None:
+            desc = desc_remove_re.sub('', bomentry.description)
+
+        annotations = comp_data['comments']
+        lic_string, custom_lics = comp_data['licenses']
+        for thislic, lic_text in custom_lics:
+            if globals.state.add_license(thislic):
+                spdx.add_extracted_license({
+                    'licenseID': spdx.quote(thislic),
+                    'extractedText': lic_text
+                })
 
         component_package_supplier = ''
 
         # homepage = 'NOASSERTION'
-        homepage = comp_data_dict[cver]['url']
+        homepage = comp_data['url']
 
-        bom_package_supplier = comp_data_dict[cver]['supplier']
+        bom_package_supplier = comp_data['supplier']
 
         packageinfo = "This is a"
 
-        if bomentry['componentType'] == 'CUSTOM_COMPONENT':
+        if bomentry.component_type == 'CUSTOM_COMPONENT':
             packageinfo = packageinfo + " custom component"
-        if bomentry['componentType'] == 'SUB_PROJECT':
+        if bomentry.component_type == 'SUB_PROJECT':
             packageinfo = packageinfo + " sub project"
         else:
             packageinfo = packageinfo + "n open source component from the Black Duck Knowledge Base"
 
-        if len(bomentry['matchTypes']) > 0:
-            firstType = bomentry['matchTypes'][0]
+        if len(bomentry.match_types) > 0:
+            firstType = bomentry.match_types[0]
             if firstType == 'MANUAL_BOM_COMPONENT':
                 packageinfo = packageinfo + " which was manually added"
             else:
@@ -99,15 +113,15 @@ def process_comp(comps_dict, tcomp, comp_data_dict):
         if bom_package_supplier is not None and len(bom_package_supplier) > 0:
             packageinfo = packageinfo + ", the PackageSupplier was provided by the user at the BOM level"
             packagesuppliername = packagesuppliername + bom_package_supplier
-            pkg = "supplier:{}/{}/{}".format(bom_package_supplier.replace("Organization: ", ""), tcomp['componentName'],
-                                             tcomp['componentVersionName'])
+            pkg = "supplier:{}/{}/{}".format(bom_package_supplier.replace("Organization: ", ""), tcomp.name,
+                                             tcomp.version_name)
         elif component_package_supplier is not None and len(component_package_supplier) > 0:
             packageinfo = packageinfo + ", the PackageSupplier was populated in the component"
             packagesuppliername = packagesuppliername + component_package_supplier
             pkg = "supplier:{}/{}/{}".format(component_package_supplier.replace("Organization: ", ""),
-                                             tcomp['componentName'], tcomp['componentVersionName'])
-        elif bomentry['origins'] is not None and len(bomentry['origins']) > 0:
-            packagesuppliername = packagesuppliername + "Organization: " + bomentry['origins'][0]['externalNamespace']
+                                             tcomp.name, tcomp.version_name)
+        elif bomentry.origin is not None:
+            packagesuppliername = packagesuppliername + "Organization: " + bomentry.origin.namespace
             packageinfo = packageinfo + ", the PackageSupplier was based on the externalNamespace"
         else:
             packageinfo = packageinfo + ", the PackageSupplier was not populated"
@@ -117,8 +131,8 @@ def process_comp(comps_dict, tcomp, comp_data_dict):
 
         thisdict = {
             "SPDXID": spdx.quote(spdxpackage_name),
-            "name": spdx.quote(tcomp['componentName']),
-            "versionInfo": spdx.quote(tcomp['componentVersionName']),
+            "name": spdx.quote(tcomp.name),
+            "versionInfo": spdx.quote(tcomp.version_name),
             "packageFileName": spdx.quote(package_file),
             "description": spdx.quote(desc),
             "downloadLocation": spdx.quote(download_url),
@@ -155,7 +169,7 @@ def process_comp(comps_dict, tcomp, comp_data_dict):
                 {
                     "referenceCategory": "OTHER",
                     "referenceType": "BlackDuckHub-Component",
-                    "referenceLocator": tcomp['component'],
+                    "referenceLocator": tcomp.component,
                 },
                 {
                     "referenceCategory": "OTHER",
@@ -167,50 +181,50 @@ def process_comp(comps_dict, tcomp, comp_data_dict):
                 thisdict['externalRefs'].append({
                     "referenceCategory": "OTHER",
                     "referenceType": "OpenHub",
-                    "referenceLocator": openhub_url
+                    # The locator has always been output as the OpenHub link object
+                    "referenceLocator": {'rel': 'openhub', 'href': openhub_url}
                 })
 
-        globals.spdx['packages'].append(thisdict)
+        spdx.add_package(thisdict)
     return spdxpackage_name
 
 
-def process_children(pkgname, compverurl, child_url, indenttext, comps_dict, comp_data_dict):
-    res = globals.bd.get_json(child_url + '?limit=5000')
-
+def process_children(pkgname, compverurl, child_url, indenttext, comps_dict, hierarchy):
     count = 0
-    for child in res['items']:
-        if 'componentName' in child and 'componentVersionName' in child:
+    for child in hierarchy.get(child_url, []):
+        if child.name is not None and child.version_name is not None:
             if config.args.debug:
-                print("{}{}/{}".format(indenttext, child['componentName'], child['componentVersionName']))
+                print("{}{}/{}".format(indenttext, child.name, child.version_name))
         else:
             # No version - skip
-            print("{}{}/{} (SKIPPED)".format(indenttext, child['componentName'], '?'))
+            print("{}{}/{} (SKIPPED)".format(indenttext, child.name, '?'))
             continue
 
-        childpkgname = process_comp(comps_dict, child, comp_data_dict)
+        childpkgname = process_comp(comps_dict, child)
         count += 1
         if childpkgname != '':
             reln = False
             for tchecktype in globals.matchtype_depends_dict.keys():
-                if tchecktype in child['matchTypes']:
+                if tchecktype in child.match_types:
                     spdx.add_relationship(pkgname, childpkgname, globals.matchtype_depends_dict[tchecktype])
                     reln = True
                     break
             if not reln:
                 for tchecktype in globals.matchtype_contains_dict.keys():
-                    if tchecktype in child['matchTypes']:
+                    if tchecktype in child.match_types:
                         spdx.add_relationship(pkgname, childpkgname,
                                               globals.matchtype_contains_dict[tchecktype])
                         break
-            globals.processed_comp_list.append(child['componentVersion'])
+            globals.state.add_processed(child.component_version)
         else:
-            pass
+            # No package was created for the child (e.g. an excluded ignored component) so its children are related
+            # to the nearest package above it
+            childpkgname = pkgname
 
-        if len(child['_meta']['links']) > 2:
-            thisref = [d['href'] for d in child['_meta']['links'] if d['rel'] == 'children']
-            if len(thisref) > 0:
-                count += process_children(childpkgname, child['componentVersion'], thisref[0], "    " + indenttext,
-                                          comps_dict, comp_data_dict)
+        thisref = child.links.get('children')
+        if thisref is not None:
+            count += process_children(childpkgname, child.component_version, thisref, "    " + indenttext,
+                                      comps_dict, hierarchy)
 
     return count
 
@@ -229,48 +243,52 @@ def process_comp_relationship(parentname, childname, mtypes):
                 break
 
 
-def process_project(project, version, projspdxname, hcomps, bearer_token, exclude_ignored=False):
+async def process_project(project, version, projspdxname, hcomps, exclude_ignored=False):
     # project, version = check_projver(proj, ver)
 
     start_time = time.time()
     print('Getting component list ... ', end='')
-    bom_compsdict = data.get_bom_components(version, exclude_ignored)
+    bom_compsdict = await data.get_bom_components(version, exclude_ignored)
     print("({})".format(str(len(bom_compsdict))))
     if config.args.debug:
         print("--- %s seconds ---" % (time.time() - start_time))
 
+    globals.subproject_path.append((project['name'], version['versionName']))
+
     start_time = time.time()
-    if platform.system() == "Windows":
-        asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
-    comp_data_dict = asyncio.run(async_main(bom_compsdict, bearer_token, version))
+    hierarchy, subproject_keys = await async_main(bom_compsdict, hcomps, version)
     if config.args.debug:
         print("--- %s seconds ---" % (time.time() - start_time))
 
+    return await process_bom(projspdxname, hcomps, bom_compsdict, hierarchy, subproject_keys)
+
+
+async def process_bom(projspdxname, hcomps, bom_compsdict, hierarchy, subproject_keys):
     #
     # Process hierarchical BOM elements
     start_time = time.time()
     print('Processing hierarchical BOM ...')
     compcount = 0
     for hcomp in hcomps:
-        if 'componentVersionName' in hcomp:
-            compname = "{}/{}".format(hcomp['componentName'], hcomp['componentVersionName'])
+        if hcomp.version_name is not None:
+            compname = "{}/{}".format(hcomp.name, hcomp.version_name)
             if config.args.debug:
                 print(compname)
         else:
-            print("{}/? - (no version - skipping)".format(hcomp['componentName']))
+            print("{}/? - (no version - skipping)".format(hcomp.name))
             continue
 
-        pkgname = process_comp(bom_compsdict, hcomp, comp_data_dict)
+        pkgname = process_comp(bom_compsdict, hcomp)
 
         if pkgname != '':
-            process_comp_relationship(projspdxname, pkgname, hcomp['matchTypes'])
-            globals.processed_comp_list.append(hcomp['componentVersion'])
+            process_comp_relationship(projspdxname, pkgname, hcomp.match_types)
+            globals.state.add_processed(hcomp.component_version)
             compcount += 1
 
-            href = [d['href'] for d in hcomp['_meta']['links'] if d['rel'] == 'children']
-            if len(href) > 0:
-                compcount += process_children(pkgname, hcomp['componentVersion'], href[0], "--> ", bom_compsdict,
-                                              comp_data_dict)
+            href = hcomp.links.get('children')
+            if href is not None:
+                compcount += process_children(pkgname, hcomp.component_version, href, "--> ", bom_compsdict,
+                                              hierarchy)
 
     print('Processed {} hierarchical components'.format(compcount))
     if config.args.debug:
@@ -281,273 +299,362 @@ def process_project(project, version, projspdxname, hcomps, bearer_token, exclud
     print('Processing other components ...')
     start_time = time.time()
     compcount = 0
+    subprojects = []
     for key, bom_component in bom_compsdict.items():
-        if 'componentVersion' not in bom_component.keys():
+        if bom_component.component_version is None:
             print(
-                "INFO: Skipping component {} which has no assigned version".format(bom_component['componentName']))
+                "INFO: Skipping component {} which has no assigned version".format(bom_component.name))
             continue
 
-        compname = bom_component['componentName'] + "/" + bom_component['componentVersionName']
-        if bom_component['componentVersion'] in globals.processed_comp_list:
+        compname = bom_component.name + "/" + bom_component.version_name
+        if globals.state.is_processed(bom_component.component_version):
             continue
         # Check if this component is a sub-project
-        # if bom_component['matchTypes'][0] == "MANUAL_BOM_COMPONENT":
+        # if bom_component.match_types[0] == "MANUAL_BOM_COMPONENT":
         if config.args.debug:
             print(compname)
         compcount += 1
 
-        pkgname = process_comp(bom_compsdict, bom_component, comp_data_dict)
+        pkgname = process_comp(bom_compsdict, bom_component)
 
-        process_comp_relationship(projspdxname, pkgname, bom_component['matchTypes'])
+        process_comp_relationship(projspdxname, pkgname, bom_component.match_types)
 
-        if config.args.recursive and bom_component['componentName'] in globals.proj_list:
-            #
-            # Need to check if this component is a sub-project
-            params = {
-                'q': "name:" + bom_component['componentName'],
-            }
-            sub_projects = globals.bd.get_resource('projects', params=params)
-            for sub_proj in sub_projects:
-                params = {
-                    'q': "versionName:" + bom_component['componentVersionName'],
-                }
-                sub_versions = globals.bd.get_resource('versions', parent=sub_proj, params=params)
-                for sub_ver in sub_versions:
-                    print("Processing project within project '{}'".format(
-                        bom_component['componentName'] + '/' + bom_component['componentVersionName']))
-
-                    res = globals.bd.list_resources(parent=sub_ver)
-                    # if 'components' in res:
-                    #     sub_comps = globals.bd.get_resource('components', parent=sub_ver)
-                    # else:
-                    #     thishref = res['href'] + "/components?limit=2000"
-                    #     headers = {
-                    #         'accept': "application/vnd.blackducksoftware.bill-of-materials-6+json",
-                    #     }
-                    #     res2 = globals.bd.get_json(thishref, headers=headers)
-                    #     sub_comps = res2['items']
-
-                    if 'hierarchical-components' in res:
-                        sub_hierarchical_bom = globals.bd.get_resource('hierarchical-components', parent=sub_ver)
-                    else:
-                        thishref = res['href'] + "/hierarchical-components?limit=2000"
-                        headers = {
-                            'accept': "application/vnd.blackducksoftware.bill-of-materials-6+json",
-                        }
-                        res2 = globals.bd.get_json(thishref, headers=headers)
-                        sub_hierarchical_bom = res2['items']
-
-                    subprojspdxname = spdx.clean_for_spdx(bom_component['componentName'] + '/' +
-                                                          bom_component['componentVersionName'])
-                    # subproj_compsdict = get_bom_components(sub_ver)
-                    # subproj_comp_data_dict = asyncio.run(async_main(subproj_compsdict, bearer_token, res['href']))
-                    subproj, subver = projects.check_projver(bom_component['componentName'],
-                                                             bom_component['componentVersionName'])
-                    compcount += process_project(subproj, subver,
-                                                 subprojspdxname, sub_hierarchical_bom, bearer_token)
-                    break
-                break
+        if bom_component.component_version in subproject_keys:
+            subprojects.append((compname, subproject_keys[bom_component.component_version], bom_component))
+
+    # The sub-projects are fetched concurrently but added to the document one at a time in BOM order, so the
+    # output does not depend on which sub-project finishes first
+    for compname, key, bom_component in subprojects:
+        if key in globals.subproject_path:
+            path = [name + '/' + ver for name, ver in globals.subproject_path[globals.subproject_path.index(key):]]
+            print("WARNING: Project '{}' contains itself through its sub-projects ({}) - skipping".format(
+                compname, ' -> '.join(path + [compname])))
+            continue
+        if key in globals.exported_subprojects:
+            if config.args.debug:
+                print("Project within project '{}' already processed - reusing its packages".format(compname))
+            continue
+        # The fetch is started now if it was not started with the other sub-projects
+        sub = await subproject_task(key, bom_component)
+        if sub is not None:
+            print("Processing project within project '{}'".format(compname))
+            compcount += await process_subproject(spdx.clean_for_spdx(compname), key, sub)
 
     print('Processed {} other components'.format(compcount))
     if config.args.debug:
         print("--- %s seconds ---" % (time.time() - start_time))
-    # print('Output {} Overall components'.format(len(globals.processed_comp_list)))
 
     return compcount
 
 
-async def async_main(compsdict, token, ver):
-    async with aiohttp.ClientSession() as session:
-        copyright_tasks = []
-        comment_tasks = []
-        file_tasks = []
-        lic_tasks = []
-        url_tasks = []
-        supplier_tasks = []
-        # child_tasks = []
-        for url, comp in compsdict.items():
-            if config.args.debug:
-                print(comp['componentName'] + '/' + comp['componentVersionName'])
-            copyright_task = asyncio.ensure_future(async_get_copyrights(session, comp, token))
-            copyright_tasks.append(copyright_task)
-
-            comment_task = asyncio.ensure_future(async_get_comments(session, comp, token))
-            comment_tasks.append(comment_task)
-
-            file_task = asyncio.ensure_future(async_get_files(session, comp, token))
-            file_tasks.append(file_task)
-
-            lic_task = asyncio.ensure_future(async_get_licenses(session, comp, token))
-            lic_tasks.append(lic_task)
-
-            url_task = asyncio.ensure_future(async_get_url(session, comp, token))
-            url_tasks.append(url_task)
+async def process_subproject(projspdxname, key, sub):
+    hcomps, bom_compsdict, hierarchy, spool = sub
+    print('Getting component list ... ({})'.format(len(bom_compsdict)))
+    globals.subproject_path.append(key)
+    subproject_keys = start_subprojects(bom_compsdict, hcomps, hierarchy)
+    # The component data was fetched with the sub-project and spooled in BOM order
+    spool.seek(0)
+    for comp, line in zip(bom_compsdict.values(), spool):
+        process_comp(bom_compsdict, comp, jsoncodec.loads(line))
+    spool.close()
+    compcount = await process_bom(projspdxname, hcomps, bom_compsdict, hierarchy, subproject_keys)
+    globals.subproject_path.pop()
+    globals.exported_subprojects.add(key)
+    # Release the sub-project data
+    globals.subproject_exports.pop(key, None)
+    return compcount
 
-            supplier_task = asyncio.ensure_future(async_get_supplier(session, comp, token))
-            supplier_tasks.append(supplier_task)
 
+def start_subprojects(bom_compsdict, hcomps, hierarchy):
+    # Start a task to find and fetch each component which could be a sub-project, unless one was already started
+    # for the same project version (or it is one of the projects being processed or already exported) - returns
+    # a dict of componentVersion -> (project name, version name)
+    subproject_keys = {}
+    if config.args.recursive:
+        # Components in the hierarchical BOM (or processed in an earlier project) are processed as components, not
+        # sub-projects, so they are not fetched
+        hcvers = {hcomp.component_version for hcomp in hcomps}
+        for children in hierarchy.values():
+            hcvers.update(child.component_version for child in children)
+        for cver, bom_component in bom_compsdict.items():
+            # Only sub-project components need a project lookup (assume any component could be one if the
+            # server does not report the component type)
+            if bom_component.component_type in ('SUB_PROJECT', None):
+                key = (bom_component.name, bom_component.version_name)
+                subproject_keys[cver] = key
+                if cver not in hcvers and not globals.state.is_processed(cver) and \
+                        key not in globals.subproject_path:
+                    subproject_task(key, bom_component)
+    return subproject_keys
+
+
+def subproject_task(key, bom_component):
+    if key not in globals.subproject_exports and key not in globals.exported_subprojects:
+        globals.subproject_exports[key] = asyncio.ensure_future(async_get_subproject(bom_component))
+    return globals.subproject_exports.get(key)
+
+
+async def stop_subprojects():
+    # Cancel any sub-project fetches still running when the export is complete (e.g. after an error)
+    tasks = list(globals.subproject_exports.values())
+    globals.subproject_exports.clear()
+    for task in tasks:
+        task.cancel()
+    for sub in await asyncio.gather(*tasks, return_exceptions=True):
+        # Remove the spools of sub-projects which were fetched but not processed
+        if isinstance(sub, tuple):
+            sub[3].close()
+
+
+async def async_get_subproject(bom_component):
+    # Find the project version for a sub-project component and get its hierarchical BOM, component list and the
+    # data of its components (--max_subprojects sub-projects at a time). The component data is spooled to a
+    # temporary file in BOM order, so the sub-projects can be fetched concurrently without holding their data in
+    # memory while they wait to be processed in BOM order. Returns None if the component is not a sub-project.
+    subproj = await projects.find_project(bom_component.name)
+    if subproj is None:
+        return None
+    params = {
+        'q': "versionName:" + bom_component.version_name,
+    }
+    sub_versions = await globals.bd.get_resource('versions', parent=subproj, params=params)
+    subver = next((v for v in sub_versions if v['versionName'] == bom_component.version_name), None)
+    if subver is None:
+        return None
+
+    async with globals.subproject_limit:
+        res = globals.bd.list_resources(parent=subver)
+        if 'hierarchical-components' in res:
+            sub_hierarchical_bom = await globals.bd.get_items(res['hierarchical-components'], convert=Component)
+        else:
+            thishref = res['href'] + "/hierarchical-components?limit=2000"
+            res2 = await globals.bd.get_json(
+                thishref, accept="application/vnd.blackducksoftware.bill-of-materials-6+json")
+            sub_hierarchical_bom = [Component(hcomp) for hcomp in res2['items']]
+
+        sub_compsdict = await data.get_bom_components(subver, False)
+        spool = tempfile.TemporaryFile('w+', encoding='utf-8')
+        try:
+            hierarchy, _ = await async_main(sub_compsdict, sub_hierarchical_bom, subver, spool)
+        except BaseException:
+            spool.close()
+            raise
+    return sub_hierarchical_bom, sub_compsdict, hierarchy, spool
+
+
+async def async_main(compsdict, hcomps, ver, spool=None):
+    # Fetch the data for a window of components at a time and create the SPDX package for each component as
+    # soon as its own requests complete, so only the in-flight components' data is held in memory.
+    # The hierarchical BOM children are fetched at the same time and returned for processing, and the sub-project
+    # fetches are started as soon as the hierarchy is known (so they overlap with the component data requests).
+    # Returns the hierarchy and the sub-project keys (see start_subprojects).
+    # If spool is given (a sub-project fetched before it is processed) the component data is written to it as
+    # one JSON line per component instead, and the sub-projects are started when it is processed.
+    hierarchy_task = asyncio.ensure_future(async_get_hierarchy(hcomps))
+    plan = plan_comp_fetches()
+    if config.args.debug:
+        print("Requesting component data: {}".format(', '.join(plan)))
+    if spool is None:
         print('Getting component data ... ')
-        all_copyrights = dict(await asyncio.gather(*copyright_tasks))
-        all_comments = dict(await asyncio.gather(*comment_tasks))
-        all_files = dict(await asyncio.gather(*file_tasks))
-        all_lics = dict(await asyncio.gather(*lic_tasks))
-        all_urls = dict(await asyncio.gather(*url_tasks))
-        all_suppliers = dict(await asyncio.gather(*supplier_tasks))
-
-        # all_children = dict(await asyncio.gather(*child_tasks))
-        await asyncio.sleep(0.250)
-
-    comp_data_dict = {}
-    for cvurl in compsdict.keys():
-        comp_data_dict[cvurl] = {
-            'copyrights': all_copyrights[cvurl],
-            'comments': all_comments[cvurl],
-            'files': all_files[cvurl],
-            'licenses': all_lics[cvurl],
-            'url': all_urls[cvurl],
-            'supplier': all_suppliers[cvurl]
-        }
-    return comp_data_dict
+    # The results are processed in BOM order so the output is the same on every run - a finished result is kept
+    # (by its index in compsdict) until the results of all the components before it have been processed.
+    # Fetching stops while too many results are waiting for an earlier component.
+    comps = enumerate(compsdict.values())
+    pending = {}
+    finished = {}
+    next_index = 0
+    subproject_keys = None
+    try:
+        while True:
+            while len(pending) < config.args.max_concurrency and \
+                    len(pending) + len(finished) < 4 * config.args.max_concurrency:
+                index, comp = next(comps, (None, None))
+                if comp is None:
+                    break
+                if config.args.debug:
+                    print(comp.name + '/' + comp.version_name)
+                pending[asyncio.ensure_future(async_get_comp_data(comp, plan))] = index
+            if len(pending) == 0:
+                break
 
+            waiting = list(pending)
+            if subproject_keys is None and spool is None:
+                waiting.append(hierarchy_task)
+            done, _ = await asyncio.wait(waiting, return_when=asyncio.FIRST_COMPLETED)
+            if subproject_keys is None and spool is None and hierarchy_task.done():
+                subproject_keys = start_subprojects(compsdict, hcomps, hierarchy_task.result())
+            for task in done:
+                if task in pending:
+                    finished[pending.pop(task)] = task.result()
+            while next_index in finished:
+                comp, comp_data = finished.pop(next_index)
+                next_index += 1
+                if spool is None:
+                    process_comp(compsdict, comp, comp_data)
+                else:
+                    spool.write(jsoncodec.dumps(comp_data) + '\n')
+    except BaseException:
+        # Stop the fetches for this BOM if it is cancelled (or processing fails)
+        for task in list(pending) + [hierarchy_task]:
+            task.cancel()
+        raise
+
+    hierarchy = await hierarchy_task
+    if subproject_keys is None and spool is None:
+        subproject_keys = start_subprojects(compsdict, hcomps, hierarchy)
+    return hierarchy, subproject_keys
+
+
+async def async_get_hierarchy(hcomps):
+    # Breadth first traversal of the hierarchical BOM - all the children lists at one level are requested
+    # concurrently. Returns a dict of children URL -> list of child entries.
+    hierarchy = {}
+    level = []
+    for hcomp in hcomps:
+        href = hcomp.links.get('children')
+        if href is not None and href not in level:
+            level.append(href)
+
+    while len(level) > 0:
+        results = await asyncio.gather(*[async_get_children(href) for href in level])
+        next_level = []
+        for href, children in zip(level, results):
+            hierarchy[href] = children
+        for children in results:
+            for child in children:
+                thisref = child.links.get('children')
+                if thisref is not None and thisref not in hierarchy and thisref not in next_level:
+                    next_level.append(thisref)
+        level = next_level
+    return hierarchy
+
+
+async def async_get_children(child_url):
+    return await globals.bd.get_items(child_url, "application/vnd.blackducksoftware.bill-of-materials-6+json",
+                                      'children', page_size=globals.hierarchy_page_size, convert=Component)
+
+
+def plan_comp_fetches():
+    # Only request the component data which will be used in the output with the current options
+    plan = ['comments', 'licenses', 'urls', 'suppliers']
+    if not config.args.no_copyrights:
+        plan.append('copyrights')
+    if not config.args.no_files:
+        plan.append('files')
+    if config.args.download_loc:
+        plan.append('downloads')
+    return plan
+
+
+async def async_get_comp_data(comp, plan):
+    # Request class -> comp_data key and fetcher
+    fetchers = {
+        'copyrights': ('copyrights', async_get_copyrights),
+        'comments': ('comments', async_get_comments),
+        'files': ('files', async_get_files),
+        'licenses': ('licenses', async_get_licenses),
+        'urls': ('url', async_get_url),
+        'suppliers': ('supplier', async_get_supplier),
+        'downloads': ('download', async_get_download),
+    }
+    # Values used for data which is not requested
+    comp_data = {
+        'copyrights': "NOASSERTION",
+        'comments': [],
+        'files': "NOASSERTION",
+        'licenses': ("NOASSERTION", []),
+        'url': "NOASSERTION",
+        'supplier': '',
+        'download': "NOASSERTION",
+    }
+    results = await asyncio.gather(*[fetchers[endpoint][1](comp) for endpoint in plan])
+    for endpoint, (cver, value) in zip(plan, results):
+        comp_data[fetchers[endpoint][0]] = value
+    return comp, comp_data
 
-async def async_get_copyrights(session, comp, token):
-    if not globals.verify:
-        ssl = False
-    else:
-        ssl = None
 
+async def async_get_copyrights(comp):
     copyrights = "NOASSERTION"
-    if len(comp['origins']) < 1:
-        return comp['componentVersion'], copyrights
-
-    orig = comp['origins'][0]
-    link = next((item for item in orig['_meta']['links'] if item["rel"] == "component-origin-copyrights"), None)
-    thishref = link['href'] + "?limit=100"
-    headers = {
-        'accept': "application/vnd.blackducksoftware.copyright-4+json",
-        'Authorization': f'Bearer {token}',
-    }
+    if comp.origin is None:
+        return comp.component_version, copyrights
+
+    link = comp.origin.links.get('component-origin-copyrights')
+    if link is None:
+        return comp.component_version, copyrights
+    thishref = link + "?limit=100"
     # resp = globals.bd.get_json(thishref, headers=headers)
-    async with session.get(thishref, headers=headers, ssl=ssl) as resp:
-        result_data = await resp.json()
-        for copyrt in result_data['items']:
-            if copyrt['active']:
-                thiscr = copyrt['updatedCopyright'].splitlines()[0].strip()
-                if thiscr not in copyrights:
-                    if copyrights == "NOASSERTION":
-                        copyrights = thiscr
-                    else:
-                        copyrights += "\n" + thiscr
-    return comp['componentVersion'], copyrights
-
-
-async def async_get_comments(session, comp, token):
-    if not globals.verify:
-        ssl = False
-    else:
-        ssl = None
+    result_data = await globals.bd.get_json(thishref, "application/vnd.blackducksoftware.copyright-4+json",
+                                            'copyrights')
+    for copyrt in result_data['items']:
+        if copyrt['active']:
+            thiscr = copyrt['updatedCopyright'].splitlines()[0].strip()
+            if thiscr not in copyrights:
+                if copyrights == "NOASSERTION":
+                    copyrights = thiscr
+                else:
+                    copyrights += "\n" + thiscr
+    return comp.component_version, copyrights
+
 
+async def async_get_comments(comp):
     annotations = []
-    hrefs = comp['_meta']['links']
-
-    link = next((item for item in hrefs if item["rel"] == "comments"), None)
-    if link:
-        thishref = link['href']
-        headers = {
-            'Authorization': f'Bearer {token}',
-            'accept': "application/vnd.blackducksoftware.bill-of-materials-6+json",
-        }
+    thishref = comp.links.get('comments')
+    if thishref is not None:
         # resp = globals.bd.get_json(thishref, headers=headers)
-        async with session.get(thishref, headers=headers, ssl=ssl) as resp:
-            result_data = await resp.json()
-            mytime = datetime.datetime.now()
-            # mytime.strftime("%Y-%m-%dT%H:%M:%S.%fZ")
-            for comment in result_data['items']:
-                annotations.append(
-                    {
-                        "annotationDate": spdx.quote(mytime.strftime("%Y-%m-%dT%H:%M:%S.%fZ")),
-                        "annotationType": "OTHER",
-                        "annotator": spdx.quote("Person: " + comment['user']['email']),
-                        "comment": spdx.quote(comment['comment']),
-                    }
-                )
-    return comp['componentVersion'], annotations
-
-
-async def async_get_files(session, comp, token):
-    if not globals.verify:
-        ssl = False
-    else:
-        ssl = None
-
-    retfile = "NOASSERTION"
-    hrefs = comp['_meta']['links']
-
-    link = next((item for item in hrefs if item["rel"] == "matched-files"), None)
-    if link:
-        thishref = link['href']
-        headers = {
-            'Authorization': f'Bearer {token}',
-            'accept': "application/vnd.blackducksoftware.bill-of-materials-6+json",
-        }
+        result_data = await globals.bd.get_json(thishref, "application/vnd.blackducksoftware.bill-of-materials-6+json",
+                                                'comments')
+        mytime = datetime.datetime.now()
+        # mytime.strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+        for comment in result_data['items']:
+            annotations.append(
+                {
+                    "annotationDate": spdx.quote(mytime.strftime("%Y-%m-%dT%H:%M:%S.%fZ")),
+                    "annotationType": "OTHER",
+                    "annotator": spdx.quote("Person: " + comment['user']['email']),
+                    "comment": spdx.quote(comment['comment']),
+                }
+            )
+    return comp.component_version, annotations
 
-        async with session.get(thishref, headers=headers, ssl=ssl) as resp:
-            result_data = await resp.json()
-            cfile = result_data['items']
-            if len(cfile) > 0:
-                rfile = cfile[0]['filePath']['path']
-                for ext in ['.jar', '.ear', '.war', '.zip', '.gz', '.tar', '.xz', '.lz', '.bz2', '.7z',
-                            '.rar', '.rar', '.cpio', '.Z', '.lz4', '.lha', '.arj', '.rpm', '.deb', '.dmg',
-                            '.gz', '.whl']:
-                    if rfile.endswith(ext):
-                        retfile = rfile
-    return comp['componentVersion'], retfile
-
-
-async def async_get_licenses(session, lcomp, token):
-    if not globals.verify:
-        ssl = False
-    else:
-        ssl = None
 
-    # Get licenses
+async def async_get_files(comp):
+    retfile = "NOASSERTION"
+    thishref = comp.links.get('matched-files')
+    if thishref is not None:
+        result_data = await globals.bd.get_json(thishref, "application/vnd.blackducksoftware.bill-of-materials-6+json",
+                                                'files')
+        cfile = result_data['items']
+        if len(cfile) > 0:
+            rfile = cfile[0]['filePath']['path']
+            for ext in ['.jar', '.ear', '.war', '.zip', '.gz', '.tar', '.xz', '.lz', '.bz2', '.7z',
+                        '.rar', '.rar', '.cpio', '.Z', '.lz4', '.lha', '.arj', '.rpm', '.deb', '.dmg',
+                        '.gz', '.whl']:
+                if rfile.endswith(ext):
+                    retfile = rfile
+    return comp.component_version, retfile
+
+
+async def async_get_licenses(lcomp):
+    # Get licenses - returns the license string and the (license id, text) of the custom licenses, which are added
+    # to the document when the component is processed so they are in the same order on every run
     lic_string = "NOASSERTION"
+    custom_lics = []
     quotes = False
-    license_type = "NONE"
-    if 'licenses' in lcomp.keys():
-        proc_item = lcomp['licenses']
-
-        if len(proc_item[0]['licenses']) > 1:
-            license_type = proc_item[0]['licenseType']
-            proc_item = proc_item[0]['licenses']
-
-        for lic in proc_item:
+    license_type = lcomp.license_type
+    if lcomp.licenses is not None:
+        for spdx_id, lic_display, lic_href in lcomp.licenses:
             thislic = ''
-            if 'spdxId' in lic:
-                thislic = lic['spdxId']
+            if spdx_id is not None:
+                thislic = spdx_id
                 if thislic in spdx.spdx_deprecated_dict.keys():
                     thislic = spdx.spdx_deprecated_dict[thislic]
             else:
                 # Custom license
                 try:
-                    thislic = 'LicenseRef-' + spdx.clean_for_spdx(lic['licenseDisplay'] + '-' + lcomp['componentName'])
-                    lic_ref = lic['license'].split("/")[-1]
-                    headers = {
-                        'accept': "text/plain",
-                        'Authorization': f'Bearer {token}',
-                    }
-                    # resp = globals.bd.session.get('/api/licenses/' + lic_ref + '/text', headers=headers)
-                    thishref = f"{globals.bd.base_url}/api/licenses/{lic_ref}/text"
-                    async with session.get(thishref, headers=headers, ssl=ssl) as resp:
-                        # lic_text = await resp.content.decode("utf-8")
-                        lic_text = await resp.text('utf-8')
-                        if thislic not in globals.spdx_lics:
-                            mydict = {
-                                'licenseID': spdx.quote(thislic),
-                                'extractedText': spdx.quote(lic_text)
-                            }
-                            globals.spdx["hasExtractedLicensingInfos"].append(mydict)
-                            globals.spdx_lics.append(thislic)
+                    thislic = 'LicenseRef-' + spdx.clean_for_spdx(lic_display + '-' + lcomp.name)
+                    lic_ref = lic_href.split("/")[-1]
+                    if not globals.state.has_license(thislic):
+                        custom_lics.append((thislic, await async_get_license_text(lic_ref)))
                 except Exception as exc:
                     pass
             if lic_string == "NOASSERTION":
@@ -562,75 +669,90 @@ async def async_get_licenses(session, lcomp, token):
         if quotes:
             lic_string = "(" + lic_string + ")"
 
-    return lcomp['componentVersion'], lic_string
+    return lcomp.component_version, (lic_string, custom_lics)
 
 
-async def async_get_url(session, comp, token):
-    if not globals.verify:
-        ssl = False
-    else:
-        ssl = None
+async def async_get_license_text(lic_ref):
+    # Download each custom license text once per run however many components use the license. Concurrent callers
+    # wait on the same task and share the same quoted text in their hasExtractedLicensingInfos entries.
+    if lic_ref not in globals.license_texts:
+        task = asyncio.ensure_future(async_fetch_license_text(lic_ref))
+        task.add_done_callback(lambda t: license_text_done(lic_ref, t))
+        globals.license_texts[lic_ref] = task
+    # Shield the shared task so a cancelled sub-project fetch does not cancel it for the other components
+    return await asyncio.shield(globals.license_texts[lic_ref])
+
+
+def license_text_done(lic_ref, task):
+    # A failed download is reported once (to the callers waiting for it) and removed, so the next component using
+    # the license downloads it again
+    if task.cancelled() or task.exception() is not None:
+        if globals.license_texts.get(lic_ref) is task:
+            del globals.license_texts[lic_ref]
+        if not task.cancelled():
+            print("WARNING: Unable to get the text of custom license {} ({})".format(lic_ref, task.exception()))
 
+
+async def async_fetch_license_text(lic_ref):
+    # resp = globals.bd.session.get('/api/licenses/' + lic_ref + '/text', headers=headers)
+    thishref = f"{globals.bd.base_url}/api/licenses/{lic_ref}/text"
+    # lic_text = await resp.content.decode("utf-8")
+    lic_text = await globals.bd.get_text(thishref, "text/plain", 'licenses')
+    return spdx.quote(lic_text)
+
+
+async def async_get_url(comp):
     url = "NOASSERTION"
-    if 'component' not in comp.keys():
-        return comp['componentVersion'], url
+    if comp.component is None:
+        return comp.component_version, url
 
-    link = comp['component']
-    headers = {
-        'accept': "application/vnd.blackducksoftware.bill-of-materials-6+json",
-        'Authorization': f'Bearer {token}',
-    }
-    # resp = globals.bd.get_json(thishref, headers=headers)
-    async with session.get(link, headers=headers, ssl=ssl) as resp:
-        result_data = await resp.json()
-        if 'url' in result_data.keys():
-            url = result_data['url']
-    return comp['componentVersion'], url
+    # The same KB components appear in many BOMs (and sub-projects) so each one is only fetched once per run
+    link = comp.component
+    if link not in globals.kb_urls:
+        globals.kb_urls[link] = asyncio.ensure_future(async_fetch_kb_url(link))
+    return comp.component_version, await asyncio.shield(globals.kb_urls[link])
 
 
-async def async_get_supplier(session, comp, token):
-    if not globals.verify:
-        ssl = False
-    else:
-        ssl = None
+async def async_fetch_kb_url(link):
+    url = "NOASSERTION"
+    # resp = globals.bd.get_json(thishref, headers=headers)
+    result_data = await globals.bd.get_json(link, "application/vnd.blackducksoftware.bill-of-materials-6+json", 'urls')
+    if 'url' in result_data.keys():
+        url = result_data['url']
+    return url
 
+
+async def async_get_supplier(comp):
     supplier_name = ''
-    hrefs = comp['_meta']['links']
-
-    link = next((item for item in hrefs if item["rel"] == "custom-fields"), None)
-    if link:
-        thishref = link['href']
-        headers = {
-            'Authorization': f'Bearer {token}',
-            'accept': "application/vnd.blackducksoftware.bill-of-materials-6+json",
-        }
+    thishref = comp.links.get('custom-fields')
+    if thishref is not None:
+        result_data = await globals.bd.get_json(thishref, "application/vnd.blackducksoftware.bill-of-materials-6+json",
+                                                'suppliers')
+        cfields = result_data['items']
+        sbom_field = next((item for item in cfields if item['label'] == globals.SBOM_CUSTOM_SUPPLIER_NAME),
+                          None)
+
+        if sbom_field is not None and len(sbom_field['values']) > 0:
+            supplier_name = sbom_field['values'][0]
 
-        async with session.get(thishref, headers=headers, ssl=ssl) as resp:
-            result_data = await resp.json()
-            cfields = result_data['items']
-            sbom_field = next((item for item in cfields if item['label'] == globals.SBOM_CUSTOM_SUPPLIER_NAME),
-                              None)
+    return comp.component_version, supplier_name
 
-            if sbom_field is not None and len(sbom_field['values']) > 0:
-                supplier_name = sbom_field['values'][0]
 
-    return comp['componentVersion'], supplier_name
+async def async_get_download(comp):
+    download_url = "NOASSERTION"
+    openhub_url = comp.links.get('openhub')
+    if openhub_url is not None:
+        download_url = await data.openhub_get_download(openhub_url)
+    return comp.component_version, download_url
 
 
 def get_cpe_of_component(comp):
     cpe = "NOASSERTION"
     try:
-        if 'origins' in comp.keys() and len(comp['origins']) > 0:
-            orig = comp['origins'][0]
-            if 'externalNamespace' in orig.keys() and 'externalId' in orig.keys():
-                thisid = orig['externalId'].split(':')
-                if len(thisid) < 2:
-                    cpe = "cpe:2.3:a:{}:{}:*:*:*:*:*:*".format(orig['externalNamespace'], orig['externalId'])
-                elif len(thisid) == 2:
-                    # Special case for github
-                    cpe = "cpe:2.3:a:{}:{}:*:*:*:*:*:*".format(orig['externalNamespace'], orig['externalId'])
-                elif len(thisid) == 3:
-                    cpe = "cpe:2.3:a:{}:*:*:*:*:*:*".format(orig['externalId'])
+        if comp.origin is not None:
+            orig = comp.origin
+            if orig.namespace is not None and orig.external_id is not None:
+                cpe = purl.cpe(orig.namespace, orig.external_id)
         else:
             print("	INFO: No assigned origin")
     except Exception as exc:
@@ -1,28 +1,48 @@
 #!/usr/bin/env python
 import sys
+import asyncio
 
 from export_spdx import globals
+from export_spdx import config
 
 
-def get_all_projects():
-    projs = globals.bd.get_resource('projects', items=True)
+async def find_project(name):
+    # Returns the project with this name or None. Each name is only looked up once per run
+    if name not in globals.project_index:
+        globals.project_index[name] = asyncio.ensure_future(lookup_project(name))
+    # Shield the shared lookup so a cancelled sub-project fetch does not cancel it for the other callers
+    return await asyncio.shield(globals.project_index[name])
 
-    projlist = []
-    for proj in projs:
-        projlist.append(proj['name'])
-    return projlist
 
+async def lookup_project(name):
+    if globals.cache is not None and config.args.project_cache_ttl > 0:
+        found, project = await globals.cache.run(globals.cache.lookup_project, globals.bd.base_url, name,
+                                                 config.args.project_cache_ttl)
+        if found:
+            return project
 
-def check_projver(proj, ver):
+    params = {
+        'q': "name:" + name,
+    }
+    projects = await globals.bd.get_resource('projects', params=params)
+    # The name query also returns projects containing the name
+    project = next((p for p in projects if p['name'] == name), None)
+
+    if globals.cache is not None and config.args.project_cache_ttl > 0:
+        await globals.cache.run(globals.cache.store_project, globals.bd.base_url, name, project)
+    return project
+
+
+async def check_projver(proj, ver):
     params = {
         'q': "name:" + proj,
         'sort': 'name',
     }
 
-    projects = globals.bd.get_resource('projects', params=params)
+    projects = await globals.bd.get_resource('projects', params=params)
     for p in projects:
         if p['name'] == proj:
-            versions = globals.bd.get_resource('versions', parent=p, params=params)
+            versions = await globals.bd.get_resource('versions', parent=p, params=params)
             for v in versions:
                 if v['versionName'] == ver:
                     return p, v
@@ -33,31 +53,8 @@ def check_projver(proj, ver):
 
     print("Project '{}' does not exist".format(proj))
     print('Available projects:')
-    projects = globals.bd.get_resource('projects')
+    projects = await globals.bd.get_resource('projects')
     for proj in projects:
         print(proj['name'])
     sys.exit(2)
 
-
-def get_bom_components(verdict):
-    comp_dict = {}
-    res = globals.bd.list_resources(verdict)
-    # if 'components' not in res:
-    if True:
-        # Getting the component list via a request is much quicker than the new Client model
-        thishref = res['href'] + "/components?limit=5000"
-        headers = {
-            'accept': "application/vnd.blackducksoftware.bill-of-materials-6+json",
-        }
-        res = globals.bd.get_json(thishref, headers=headers)
-        bom_comps = res['items']
-    # else:
-    #     bom_comps = globals.bd.get_resource('components', parent=ver)
-    for comp in bom_comps:
-        if 'componentVersion' not in comp:
-            continue
-        compver = comp['componentVersion']
-
-        comp_dict[compver] = comp
-
-    return comp_dict
@@ -0,0 +1,115 @@
+#!/usr/bin/env python
+import re
+import functools
+
+from export_spdx import spdx
+
+# Package URL (purl) generation from Black Duck origin external namespaces and ids:
+#
+# 1. translate external_namespace to purl_type [and optionally, purl_namespace]
+# 2. split external_id into component_id and version:
+#     if: external_namespace not in (npmjs, maven) and splt(external_id by id_separator) > 2 segements
+#         split external_id by id_separator on first occurence
+#             1: component_id
+#             2: version
+#     else:
+#         split external_id by id_separator on last occurence
+#             1: component_id
+#             2: version
+# 3. purl := "pkg:{:purl_type}"
+# 4. if purl_namespace:
+#     purl += "/{:purl_namespace}"
+# 5. if id_separator in component_id:
+#     purl += "/" + 1st part of split(component_id by id_separator)
+# 6. if id_separator not in component_id:
+#         if external_namespace is pypi
+#             then purl += "/" + regexp_replace(lower(component_id), '[-_.]+', '-', 'g')
+#             else purl += "/{:component_id}"
+#         else
+#             purl += "/" + 2nd part of split(component_id by id_separator)
+# 7. purl += "@" + 1st part of split(regexp_replace(version, '^\d+:', '') by id_separator)
+#    append qualifiers if any:
+# 8.    purl += "?"
+# 9.    if id_separator in version:
+#          then purl += "&arch=" + 2nd part of split(version by id_separator)
+# 10.   if version matches /^(\d+):/
+#         then purl += "&epoch=" + match_group_1
+# 11.   if other qualifier:
+#         append uri params
+# 12. if subpath is known (i.e. golang import subpath)
+#     purl += "#{:subpath}"
+
+epoch_re = re.compile(r'^(\d+):')
+pypi_name_re = re.compile('[-_.]+')
+
+
+class PurlParser:
+    # Converts the external ids of one origin namespace (an entry of spdx.spdx_origin_map) to purls
+    __slots__ = ('sep', 'prefix', 'split_first', 'normalise_name')
+
+    def __init__(self, namespace, origin):
+        self.sep = origin['p_sep']
+        self.prefix = "pkg:" + origin['p_type']  # 3
+        if origin['p_namespace'] != '':  # 4
+            self.prefix += "/" + origin['p_namespace']
+        self.split_first = namespace not in ['npmjs', 'maven']
+        self.normalise_name = namespace == 'pypi'
+
+    def __call__(self, extid):
+        sep = self.sep
+        if self.split_first and extid.count(sep) > 1:  # 2
+            compid, compver = extid.split(sep, maxsplit=1)
+        elif sep in extid:
+            compid, compver = extid.rsplit(sep, maxsplit=1)
+        else:
+            compid, compver = extid, None
+
+        purl = self.prefix
+        if sep in compid:  # 5
+            purl += '/' + '/'.join(spdx.quote(s) for s in compid.split(sep))
+        elif self.normalise_name:  # 6
+            purl += '/' + spdx.quote(pypi_name_re.sub('-', compid.lower()))
+        else:
+            purl += '/' + spdx.quote(compid)
+
+        qual = {}
+        if compver:
+            if sep in compver:  # 9
+                compver, qual['arch'] = compver.split(sep)
+
+            purl += '@' + spdx.quote(epoch_re.sub('', compver, count=1))  # 7
+
+            epoch_m = epoch_re.match(compver)  # 10
+            if epoch_m:
+                qual['epoch'] = epoch_m[1]
+
+        if qual:
+            purl += '?' + '&'.join('='.join([k, spdx.quote(v)]) for k, v in qual.items())  # 8
+
+        return purl
+
+
+# One parser per origin namespace, created when the module is loaded
+parsers = {namespace: PurlParser(namespace, origin) for namespace, origin in spdx.spdx_origin_map.items()}
+
+
+@functools.lru_cache(maxsize=65536)
+def purl(namespace, extid):
+    # Returns the purl for an origin, or '' if the namespace has no purl type
+    parser = parsers.get(namespace)
+    if parser is None:
+        return ''
+    return parser(extid)
+
+
+@functools.lru_cache(maxsize=65536)
+def cpe(namespace, extid):
+    thisid = extid.split(':')
+    if len(thisid) < 2:
+        return "cpe:2.3:a:{}:{}:*:*:*:*:*:*".format(namespace, extid)
+    elif len(thisid) == 2:
+        # Special case for github
+        return "cpe:2.3:a:{}:{}:*:*:*:*:*:*".format(namespace, extid)
+    elif len(thisid) == 3:
+        return "cpe:2.3:a:{}:*:*:*:*:*:*".format(extid)
+    return "NOASSERTION"
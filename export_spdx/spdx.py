@@ -1,7 +1,6 @@
 #!/usr/bin/env python
-import re
-import json
 import sys
+import functools
 
 from export_spdx import globals
 from export_spdx import config
@@ -77,20 +76,24 @@ spdx_origin_map = {
 }
 
 
-def clean_for_spdx(name):
-    newname = re.sub('[;:!*()/,]', '', name)
-    newname = re.sub('[ .]', '', newname)
-    newname = re.sub('@', '-at-', newname)
-    newname = re.sub('_', 'uu', newname)
+# Single pass translation table for clean_for_spdx()
+spdx_id_table = str.maketrans({';': None, ':': None, '!': None, '*': None, '(': None, ')': None, '/': None, ',': None,
+                               ' ': None, '.': None, '@': '-at-', '_': 'uu'})
+
 
-    return newname
+# The same component, project and license names are cleaned many times in a large BOM
+@functools.lru_cache(maxsize=65536)
+def clean_for_spdx(name):
+    return name.translate(spdx_id_table)
 
 
 def quote(name):
-    remove_chars = ['"', "'"]
-    for i in remove_chars:
-        name = name.replace(i, '')
-    return name
+    # str.replace is faster than translate() for removing the two quote characters
+    return name.replace('"', '').replace("'", '')
+
+
+def add_package(package):
+    globals.writer.add('packages', package)
 
 
 def add_relationship(parent, child, reln):
@@ -99,7 +102,11 @@ def add_relationship(parent, child, reln):
         "relationshipType": quote(reln),
         "relatedSpdxElement": quote(child)
     }
-    globals.spdx['relationships'].append(mydict)
+    globals.writer.add('relationships', mydict)
+
+
+def add_extracted_license(lic):
+    globals.writer.add('hasExtractedLicensingInfos', lic)
 
 
 def add_snippet():
@@ -139,14 +146,15 @@ def add_snippet():
 
 
 def write_spdx_file(spdx):
-    print("Writing SPDX output file {} ... ".format(config.args.output), end='')
+    print("Writing SPDX output file {} ... ".format(', '.join(config.args.output)), end='')
 
     try:
-        with open(config.args.output, 'w') as outfile:
-            json.dump(spdx, outfile, indent=4, sort_keys=True)
+        globals.writer.write(spdx)
 
     except Exception as e:
         print('ERROR: Unable to create output report file \n' + str(e))
         sys.exit(3)
+    finally:
+        globals.writer.close()
 
     print("Done")
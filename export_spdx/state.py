@@ -0,0 +1,45 @@
+#!/usr/bin/env python
+import collections
+
+
+class ExportState:
+    # Bookkeeping for an export run: the component versions which have been processed and the SPDX package and
+    # license ids in the document. The dicts are used as insertion ordered sets (values are unused).
+    def __init__(self):
+        self.processed_comps = {}
+        self.package_ids = {}
+        self.license_ids = {}
+        self.counts = collections.Counter()
+
+    def is_processed(self, cver):
+        return cver in self.processed_comps
+
+    def add_processed(self, cver):
+        if cver in self.processed_comps:
+            self.counts['repeated'] += 1
+            return
+        self.processed_comps[cver] = None
+
+    def has_package(self, spdxid):
+        return spdxid in self.package_ids
+
+    def add_package(self, spdxid):
+        # Returns False if the package id is already used
+        if spdxid in self.package_ids:
+            return False
+        self.package_ids[spdxid] = None
+        return True
+
+    def has_license(self, licid):
+        return licid in self.license_ids
+
+    def add_license(self, licid):
+        # Returns False if the license is already in the document
+        if licid in self.license_ids:
+            return False
+        self.license_ids[licid] = None
+        return True
+
+    def report(self):
+        print("Processed {} components ({} repeated in the BOM), {} packages and {} custom licenses".format(
+            len(self.processed_comps), self.counts['repeated'], len(self.package_ids), len(self.license_ids)))
@@ -0,0 +1,350 @@
+#!/usr/bin/env python
+import bz2
+import csv
+import gzip
+import io
+import lzma
+import shutil
+import tempfile
+
+from export_spdx import jsoncodec
+
+# Output compression formats: file extension and function returning a stream which writes one compressed member
+# (gzip member, xz or bz2 stream) to a binary file. A sequence of members decompresses as the concatenated data, so
+# the parts of the output are compressed separately and the compressed parts copied into the output file.
+compressors = {
+    # Level 6 (as the gzip command) is several times faster than the gzip module default of 9 for a slightly
+    # larger file
+    'gzip': ('.gz', lambda fileobj: gzip.GzipFile(fileobj=fileobj, mode='wb', compresslevel=6)),
+    'xz': ('.xz', lambda fileobj: lzma.LZMAFile(fileobj, 'wb')),
+    'bz2': ('.bz2', lambda fileobj: bz2.BZ2File(fileobj, 'wb')),
+}
+
+
+def compression_for(path):
+    # Returns the compression format for the extension of path, or None
+    for compression, (ext, compressor) in compressors.items():
+        if path.endswith(ext):
+            return compression
+    return None
+
+
+# Output format -> default file extension
+format_extensions = {
+    'json': '.json',
+    'tag-value': '.spdx',
+    'csv': '.csv',
+}
+
+
+def format_for(path):
+    # Returns the output format for the extension of path (ignoring a compression extension) - SPDX tag-value
+    # files use the .spdx extension and JSON is used for unknown extensions
+    compression = compression_for(path)
+    if compression is not None:
+        path = path[:-len(compressors[compression][0])]
+    for output_format, ext in format_extensions.items():
+        if path.endswith(ext):
+            return output_format
+    return 'json'
+
+
+class Spool:
+    # Temporary file holding a part of the output as it is produced. The text is compressed as it is written if
+    # compression is set, so the spool is copied into the output file without compressing it again.
+    def __init__(self, compression=None, newline=None):
+        self.file = tempfile.TemporaryFile()
+        stream = self.file if compression is None else compressors[compression][1](self.file)
+        self.stream = io.TextIOWrapper(stream, encoding='utf-8', newline=newline)
+
+    def write(self, text):
+        return self.stream.write(text)
+
+    def copy_to(self, outfile):
+        # Finish the compressed member and copy it to the binary output file
+        stream = self.stream.detach()
+        self.stream = None
+        if stream is not self.file:
+            stream.close()
+        self.file.seek(0)
+        shutil.copyfileobj(self.file, outfile)
+
+    def close(self):
+        if self.stream is not None:
+            self.stream.close()
+            self.stream = None
+        self.file.close()
+
+
+class Output:
+    # Binary output file the document text and spools are written to. The text written between two spools is
+    # compressed as one member if compression is set.
+    def __init__(self, path, compression=None):
+        self.file = open(path, 'wb')
+        self.compression = compression
+        self.text = []
+
+    def write(self, text):
+        self.text.append(text)
+
+    def flush(self):
+        data = ''.join(self.text).encode('utf-8')
+        self.text = []
+        if not data:
+            return
+        if self.compression is None:
+            self.file.write(data)
+        else:
+            with compressors[self.compression][1](self.file) as stream:
+                stream.write(data)
+
+    def copy(self, spool):
+        self.flush()
+        spool.copy_to(self.file)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.flush()
+        self.file.close()
+
+
+class JsonWriter:
+    # Writes the SPDX JSON document incrementally. Packages, relationships and extracted licenses are serialized
+    # as they are added into temporary files, which are copied into the output file with the document level fields
+    # when the export is complete. The output is the same as json.dump(doc, indent=4, sort_keys=True), or has no
+    # whitespace in compact mode. The sections are compressed as they are added if compression is set.
+    sections = ['packages', 'relationships', 'hasExtractedLicensingInfos']
+
+    def __init__(self, path, compact=False, compression=None):
+        self.path = path
+        self.compact = compact
+        self.compression = compression
+        self.spools = {}
+        self.counts = {}
+        for section in self.sections:
+            self.spools[section] = Spool(compression)
+            self.counts[section] = 0
+
+    def encode(self, obj, level):
+        # Serialize obj for output at the given nesting level of the document
+        if self.compact:
+            return jsoncodec.dumps(obj)
+        return jsoncodec.dumps(obj, indent=True).replace('\n', '\n' + '    ' * level)
+
+    def add(self, section, item):
+        spool = self.spools[section]
+        if self.compact:
+            if self.counts[section] > 0:
+                spool.write(',')
+            spool.write(self.encode(item, 0))
+        else:
+            if self.counts[section] > 0:
+                spool.write(',')
+            spool.write('\n        ' + self.encode(item, 2))
+        self.counts[section] += 1
+
+    def write(self, doc):
+        # Write the document fields in doc together with the added sections to the output file
+        keys = sorted(set(doc.keys()) | set(self.sections))
+        with Output(self.path, self.compression) as outfile:
+            outfile.write('{')
+            for index, key in enumerate(keys):
+                if index > 0:
+                    outfile.write(',')
+                if self.compact:
+                    outfile.write(jsoncodec.dumps(key) + ':')
+                else:
+                    outfile.write('\n    ' + jsoncodec.dumps(key) + ': ')
+                if key in self.spools:
+                    self.write_section(outfile, key)
+                else:
+                    outfile.write(self.encode(doc[key], 1))
+            outfile.write('}' if self.compact else '\n}')
+
+    def write_section(self, outfile, section):
+        if self.counts[section] == 0:
+            outfile.write('[]')
+            return
+        outfile.write('[')
+        outfile.copy(self.spools[section])
+        outfile.write(']' if self.compact else '\n    ]')
+
+    def close(self):
+        for spool in self.spools.values():
+            spool.close()
+
+
+class TagValueWriter:
+    # Writes the SPDX document in tag-value format with the same interface as JsonWriter. Each package,
+    # relationship and extracted license is converted to tag-value lines as it is added and written to a temporary
+    # file, which are copied into the output file after the document creation information at the end of the export.
+    sections = [('relationships', '## Relationships'), ('packages', '## Packages'),
+                ('hasExtractedLicensingInfos', '## Custom Licenses')]
+
+    # SPDX JSON package field -> tag, in the order they are written
+    package_tags = [
+        ('name', 'PackageName'),
+        ('SPDXID', 'SPDXID'),
+        ('versionInfo', 'PackageVersion'),
+        ('packageFileName', 'PackageFileName'),
+        ('packageSupplier', 'PackageSupplier'),
+        ('downloadLocation', 'PackageDownloadLocation'),
+        ('filesAnalyzed', 'FilesAnalyzed'),
+        ('packageHomepage', 'PackageHomePage'),
+        ('licenseConcluded', 'PackageLicenseConcluded'),
+        ('licenseDeclared', 'PackageLicenseDeclared'),
+        ('licenseComments', 'PackageLicenseComments'),
+        ('copyrightText', 'PackageCopyrightText'),
+        ('description', 'PackageDescription'),
+        ('packageComment', 'PackageComment'),
+    ]
+    # Free text fields which are enclosed in <text></text>
+    text_fields = {'licenseComments', 'copyrightText', 'description', 'packageComment', 'comment', 'extractedText'}
+
+    def __init__(self, path, compression=None):
+        self.path = path
+        self.compression = compression
+        self.spools = {}
+        self.counts = {}
+        for section, heading in self.sections:
+            self.spools[section] = Spool(compression)
+            self.counts[section] = 0
+
+    @classmethod
+    def value(cls, field, value):
+        if isinstance(value, bool):
+            return 'true' if value else 'false'
+        if field in cls.text_fields and value not in ('NOASSERTION', 'NONE'):
+            return '<text>' + value + '</text>'
+        return value
+
+    def package_lines(self, pkg):
+        lines = ['']
+        for field, tag in self.package_tags:
+            if field in pkg:
+                lines.append(tag + ': ' + self.value(field, pkg[field]))
+        for ref in pkg.get('externalRefs', []):
+            locator = ref['referenceLocator']
+            if isinstance(locator, dict):
+                # OpenHub link object
+                locator = locator['href']
+            lines.append('ExternalRef: {} {} {}'.format(ref['referenceCategory'].replace('_', '-'),
+                                                        ref['referenceType'], locator))
+        for annotation in pkg.get('annotations', []):
+            lines += [
+                'Annotator: ' + annotation['annotator'],
+                'AnnotationDate: ' + annotation['annotationDate'],
+                'AnnotationType: ' + annotation['annotationType'],
+                'SPDXREF: ' + pkg['SPDXID'],
+                'AnnotationComment: ' + self.value('comment', annotation['comment']),
+            ]
+        return lines
+
+    def add(self, section, item):
+        if section == 'packages':
+            lines = self.package_lines(item)
+        elif section == 'relationships':
+            lines = ['Relationship: {} {} {}'.format(item['spdxElementId'], item['relationshipType'],
+                                                     item['relatedSpdxElement'])]
+        else:
+            lines = ['', 'LicenseID: ' + item['licenseID'],
+                     'ExtractedText: ' + self.value('extractedText', item['extractedText'])]
+        self.spools[section].write('\n'.join(lines) + '\n')
+        self.counts[section] += 1
+
+    def document_lines(self, doc):
+        # The document creation information (documentDescribes is written as a DESCRIBES relationship, and the
+        # other fields have no tag-value document tags)
+        lines = [
+            'SPDXVersion: ' + doc['spdxVersion'],
+            'DataLicense: ' + doc['dataLicense'],
+            'SPDXID: ' + doc['SPDXID'],
+            'DocumentName: ' + doc['name'],
+            'DocumentNamespace: ' + doc['documentNamespace'],
+            '',
+            '## Creation Information',
+        ]
+        info = doc['creationInfo']
+        lines += ['Creator: ' + creator for creator in info['creators']]
+        lines += ['Created: ' + info['created'], 'LicenseListVersion: ' + info['licenseListVersion']]
+        if 'comment' in info:
+            lines.append('CreatorComment: ' + self.value('comment', info['comment']))
+        return lines
+
+    def write(self, doc):
+        with Output(self.path, self.compression) as outfile:
+            outfile.write('\n'.join(self.document_lines(doc)) + '\n')
+            for section, heading in self.sections:
+                if self.counts[section] == 0:
+                    continue
+                outfile.write('\n' + heading + '\n')
+                outfile.copy(self.spools[section])
+
+    def close(self):
+        for spool in self.spools.values():
+            spool.close()
+
+
+class CsvWriter:
+    # Writes a CSV license summary with a row for each SPDX package (the relationships and extracted licenses are
+    # not included). The rows are written to a temporary file as the packages are added and copied into the output
+    # file at the end of the export, so a failed export does not leave a partial file.
+    columns = ['Component', 'Version', 'SPDX ID', 'License Concluded', 'License Declared', 'Package URL']
+
+    def __init__(self, path, compression=None):
+        self.path = path
+        self.compression = compression
+        self.spool = Spool(compression, newline='')
+        self.csv = csv.writer(self.spool, lineterminator='\n')
+
+    def add(self, section, item):
+        if section != 'packages':
+            return
+        purl = next((ref['referenceLocator'] for ref in item.get('externalRefs', [])
+                     if ref['referenceType'] == 'purl'), '')
+        self.csv.writerow([item.get('name'), item.get('versionInfo'), item.get('SPDXID'),
+                           item.get('licenseConcluded'), item.get('licenseDeclared'), purl])
+
+    def write(self, doc):
+        with Output(self.path, self.compression) as outfile:
+            csv.writer(outfile, lineterminator='\n').writerow(self.columns)
+            outfile.copy(self.spool)
+
+    def close(self):
+        self.spool.close()
+
+
+class MultiWriter:
+    # Passes the SPDX document to several writers, so one export can write several output files
+    def __init__(self, writers):
+        self.writers = writers
+
+    def add(self, section, item):
+        for writer in self.writers:
+            writer.add(section, item)
+
+    def write(self, doc):
+        for writer in self.writers:
+            writer.write(doc)
+
+    def close(self):
+        for writer in self.writers:
+            writer.close()
+
+
+def create(outputs, compact=False):
+    # Returns the writer for a list of (path, format, compression) output files
+    writers = []
+    for path, output_format, compression in outputs:
+        if output_format == 'tag-value':
+            writers.append(TagValueWriter(path, compression))
+        elif output_format == 'csv':
+            writers.append(CsvWriter(path, compression))
+        else:
+            writers.append(JsonWriter(path, compact, compression))
+    if len(writers) == 1:
+        return writers[0]
+    return MultiWriter(writers)
@@ -16,9 +16,10 @@ setuptools.setup(
     long_description_content_type="text/markdown",
     url="https://github.com/matthewb66/bd_export_spdx2.2",
     packages=setuptools.find_packages(),
-    install_requires=['blackduck>=1.0.0',
-                      'lxml',
+    install_requires=['lxml',
                       'aiohttp'],
+    # orjson speeds up reading API responses and writing the SPDX file
+    extras_require={'fast': ['orjson']},
     classifiers=[
         "Programming Language :: Python :: 3",
         "License :: OSI Approved :: Apache-2.0",